@@ -0,0 +1,204 @@
+import http.client
+import json
+import select
+import struct
+import threading
+import time
+
+""" This file supplies a persistent streaming channel to the beamer module: one long-lived chunked `POST /v1/stream`, into which frames and sound cues get written as messages, instead of a new request per frame.
+
+Each message is a type byte, the length of the payload (4 bytes, big endian) and the payload:
+
+.. code:: python3
+
+    message = kind + struct.pack(">I", len(payload)) + payload
+
+The kinds are
+
+- `H` hello, payload `{"version": 1}` as JSON, first message of every stream
+- `F` JPEG frame (like `/v1/receiveimage`)
+- `S` scene as JSON (like `/v1/receivescene`, see SceneTransport)
+- `T` tile payload (like `/v1/receivetiles`, see TileTransport)
+- `A` sound cue, payload `{"sound": "finished"}` as JSON (like Beamer.play_sound)
+- `B` barrier, payload `{"id": 3}` as JSON. A single request with the header `X-Beamer-Barrier: 3` gets applied by the receiver only after it reached the barrier, so it can not be overtaken by messages still in the stream (see BeamerStream.barrier).
+
+Messages arrive in order and TCP delivers them reliably, so the sender treats a written message as received. A receiver that can not apply a message (e.g. a delta on the wrong base) closes the stream, the sender notices on the next write and falls back to single requests, which report errors, until the stream gets opened again. Opening does not wait for the receiver either: a receiver without `/v1/stream` answers 404 right away, which the sender notices on the next write as well.
+"""
+
+VERSION = 1
+KINDS = {"hello": b"H", "frame": b"F", "scene": b"S", "tiles": b"T", "sound": b"A", "barrier": b"B"}
+
+def message(kind, payload):
+    """ Frame a payload (bytes) as message of the kind (see KINDS) """
+    return KINDS[kind] + struct.pack(">I", len(payload)) + payload
+
+def read_messages(stream):
+    """ Generator over the (kind, payload) messages read from a file like stream, as used by the receiver. Stops at the end of the stream. """
+    names = {v: k for k, v in KINDS.items()}
+    while True:
+        head = stream.read(5)
+        if len(head) < 5:
+            return
+        n, = struct.unpack(">I", head[1:])
+        payload = stream.read(n)
+        if len(payload) < n:
+            return
+        yield names.get(head[:1], "unknown"), payload
+
+class BeamerStream:
+    """ Sending side of the streaming channel. Opens the stream on the first message and reopens it after it broke, at most every BeamerStream.retry seconds.
+
+    Writes are synchronous (they only hand the message to the socket) and can come from several threads, e.g. frames from the frame sender and sound cues from request handlers.
+
+    Args:
+        host (str): ip or host name of the beamer module
+        port (int): port of the beamer module
+        on_open (callable, optional): called after a new stream got opened, e.g. to reset delta state, as the receiver starts fresh. Defaults to None.
+        on_close (callable, optional): called as soon as the stream is found broken or rejected (see BeamerStream.end), e.g. to forget which frame the receiver acknowledged, as messages written in the meantime got lost. Defaults to None.
+        timeout (float, optional): connect and write timeout in seconds. Defaults to 3.05.
+        retry (float, optional): seconds to wait before opening the stream again after it could not be opened or was not supported. Defaults to 10.
+    """
+
+    def __init__(self, host, port, on_open=None, on_close=None, timeout=3.05, retry=10):
+        self.host, self.port = host, port
+        self.on_open = on_open
+        self.on_close = on_close
+        self.timeout = timeout
+        self.retry = retry
+        self.lock = threading.Lock()
+        self.connection = None # open http.client.HTTPConnection
+        self.failed = 0 # time of the last failure to open, or of the stream not being supported
+        self.barriers = 0 # id of the last barrier written, see BeamerStream.barrier
+        self.stats = {"opened": 0, "messages": 0, "bytes": 0, "broken": 0, "unsupported": 0}
+
+    def open(self):
+        """ Open the stream and send the hello message. Needs the lock.
+
+        Returns:
+            bool: True if the stream is open
+        """
+        if time.time() - self.failed < self.retry:
+            return False
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.putrequest("POST", "/v1/stream")
+            connection.putheader("Content-Type", "application/octet-stream")
+            connection.putheader("Transfer-Encoding", "chunked")
+            connection.endheaders()
+            self.write_chunk(connection, message("hello", json.dumps({"version": VERSION}).encode()))
+        except OSError as e:
+            connection.close()
+            print(f"Cant open the stream to the beamer-module: {e}")
+            self.failed = time.time()
+            return False
+        self.connection = connection
+        self.stats["opened"] += 1
+        if self.on_open is not None:
+            self.on_open()
+        return True
+
+    def write_chunk(self, connection, data):
+        connection.send(b"%x\r\n" % len(data) + data + b"\r\n")
+
+    def check(self):
+        """ Check without blocking whether the receiver already answered the open stream, i.e. rejected a message or does not support streaming. Needs the lock.
+
+        Returns:
+            bool: True if the stream is still open, False if it is over (it is closed afterwards)
+        """
+        try:
+            readable, _, _ = select.select([self.connection.sock], [], [], 0)
+            if len(readable) == 0:
+                return True
+            status = self.connection.getresponse().status
+        except (OSError, http.client.HTTPException) as e:
+            self.stats["broken"] += 1
+            self.end(f"The stream to the beamer-module broke: {e}")
+            return False
+        if status in [404, 405]:
+            self.stats["unsupported"] += 1
+            self.failed = time.time() # only try again after BeamerStream.retry
+            self.end(f"The beamer-module does not support streaming (status {status}), using single requests.")
+        else:
+            self.stats["broken"] += 1
+            self.end(f"The stream to the beamer-module got closed by the beamer-module (status {status}).")
+        return False
+
+    def write(self, data):
+        """ Write a framed message into the open stream, unless it is over (see BeamerStream.check). Needs the lock.
+
+        Returns:
+            bool: True if the message got written, False if the stream is over (it is closed afterwards)
+        """
+        if not self.check():
+            return False
+        try:
+            self.write_chunk(self.connection, data)
+        except OSError as e:
+            self.stats["broken"] += 1
+            self.end(f"The stream to the beamer-module broke: {e}")
+            return False
+        return True
+
+    def end(self, reason):
+        """ Close the stream after it broke or the receiver answered, and tell the owner (on_close): everything written since the receiver rejected a message was lost. Unless streaming is not supported, the stream opens again right away on the next message. Needs the lock. """
+        print(reason)
+        self.connection.close()
+        self.connection = None
+        if self.on_close is not None:
+            self.on_close()
+
+    def poll(self):
+        """ Check without blocking whether the stream is still open, see BeamerStream.check. A rejected message gets noticed here even if nothing else gets sent.
+
+        Returns:
+            bool: True if the stream is open
+        """
+        with self.lock:
+            return self.connection is not None and self.check()
+
+    def send(self, kind, payload):
+        """ Write a message into the stream, opening it if needed.
+
+        Args:
+            kind (str): kind of the message, see KINDS
+            payload (bytes): payload
+
+        Returns:
+            bool: True if the message got written, False if the stream is not available (send it as single request instead)
+        """
+        with self.lock:
+            if self.connection is None and not self.open():
+                return False
+            if not self.write(message(kind, payload)):
+                return False
+            self.stats["messages"] += 1
+            self.stats["bytes"] += len(payload)
+            return True
+
+    def barrier(self):
+        """ Write a barrier message into the stream if it is open, instead of closing the stream to make sure everything sent through it got applied. A single request carrying the id in the header `X-Beamer-Barrier` gets applied by the receiver only once it reached the barrier.
+
+        Returns:
+            int: id of the barrier, None if the stream is not open (nothing can overtake a single request then)
+        """
+        with self.lock:
+            if self.connection is None:
+                return None
+            self.barriers += 1
+            if not self.write(message("barrier", json.dumps({"id": self.barriers}).encode())):
+                return None
+            return self.barriers
+
+    def close(self):
+        """ End the stream properly (terminating chunk) """
+        with self.lock:
+            if self.connection is None:
+                return
+            try:
+                self.connection.send(b"0\r\n\r\n")
+                self.connection.getresponse()
+            except OSError:
+                pass
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,108 @@
+import threading
+import time
+
+class FrameSender:
+    """ Sends frames to the beamer from a background thread, so request handlers do not wait for encoding and posting.
+
+    The queue has a single slot and the latest frame wins: if a new frame gets pushed while the previous one is still waiting, the waiting one gets dropped, as it would be outdated on the beamer anyway. The frame currently being sent always finishes.
+
+    :param send: function that sends a single frame (encodes and posts it), gets called from the sender thread. It returns False if it skipped the frame (e.g. because the beamer already shows it). Exceptions get counted and printed, they do not stop the sender.
+    :type send: callable
+    :param name: name of the thread, defaults to "frame-sender"
+    :type name: str, optional
+    """
+
+    def __init__(self, send, name="frame-sender"):
+        self.send = send
+        self.condition = threading.Condition()
+        self.pending = None # (frame, time of the push), the single slot
+        self.busy = False # a frame is being sent right now
+        self.sending = threading.Lock() # held while FrameSender.send runs, see FrameSender.hold
+        self.stats = {
+            "pushed": 0, # frames handed to FrameSender.push
+            "sent": 0, # frames sent successfully
+            "skipped": 0, # frames FrameSender.send skipped, as the beamer already showed them
+            "dropped": 0, # frames replaced by a newer one before they got sent
+            "errors": 0, # frames where FrameSender.send raised
+            "last_ms": 0., # latency from push until sent of the last frame
+            "total_ms": 0.,
+            "max_ms": 0.
+        }
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def push(self, frame):
+        """ Queue a frame and return immediately. Replaces a frame that is still waiting.
+
+        :param frame: anything FrameSender.send accepts
+        """
+        with self.condition:
+            if self.pending is not None:
+                self.stats["dropped"] += 1
+            self.pending = (frame, time.perf_counter())
+            self.stats["pushed"] += 1
+            self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        """ Block until every pushed frame has been sent (or dropped). Used when the beamer has to show a frame before continuing, e.g. a black screen before taking an image.
+
+        :param timeout: maximum time to wait in seconds, defaults to None (no limit)
+        :type timeout: float, optional
+        :return: True if the sender is idle, False if the timeout expired
+        :rtype: bool
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: self.pending is None and not self.busy, timeout=timeout)
+
+    def hold(self):
+        """ Context manager that keeps the sender thread from sending while it is held. The frame currently being sent finishes first, pushed frames stay queued and get sent after the release. Used to send frames directly from the calling thread without anything else reaching the beamer in between, e.g. while the camera takes an image.
+
+        .. code:: python3
+
+            with frame_sender.hold():
+                ...
+
+        :rtype: threading.Lock
+        """
+        return self.sending
+
+    def run(self):
+        """ Loop of the sender thread: wait for a frame, send it, record the latency """
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending is not None)
+                (frame, pushed), self.pending = self.pending, None
+                self.busy = True
+            try:
+                with self.sending:
+                    sent = self.send(frame)
+                if sent is False:
+                    with self.condition:
+                        self.stats["skipped"] += 1
+                    continue # the finally clause still runs
+                ms = (time.perf_counter() - pushed) * 1000
+                with self.condition:
+                    self.stats["sent"] += 1
+                    self.stats["last_ms"] = ms
+                    self.stats["total_ms"] += ms
+                    self.stats["max_ms"] = max(self.stats["max_ms"], ms)
+            except Exception as e:
+                print(f"Sending frame to the beamer failed: {e}")
+                with self.condition:
+                    self.stats["errors"] += 1
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+
+    def report(self):
+        """ Counters and push latencies (in ms, from FrameSender.push until sent) so far
+
+        :rtype: dict
+        """
+        with self.condition:
+            stats = dict(self.stats)
+        stats["mean_ms"] = stats["total_ms"] / stats["sent"] if stats["sent"] != 0 else 0.
+        handled = stats["sent"] + stats["skipped"]
+        stats["skip_rate"] = stats["skipped"] / handled if handled != 0 else 0.
+        return stats
@@ -1,11 +1,26 @@
+import time
+import itertools
 import numpy as np
 from .gamemodes import common_utils as utils
 from .GameImage import BilliardBall
+from .Simulator import Simulator
 
 class GameEngine:
     """ This class implements basic physics based calculations for determining good hits.
 
     The holes get evenly spaced out along the edges of the defined size
+
+    Args:
+        size (tuple, optional): width and height of the table in mm. Defaults to (2230,1115).
+        ballDiameter (int, optional): diameter of the balls in mm. Defaults to 57.
+        budget (float, optional): seconds GameEngine.searchShots may spend, search stages that do not start in time get skipped. Defaults to 0.01.
+        cushions (int, optional): maximum number of cushions of bank shots in GameEngine.searchShots. Defaults to 2.
+        combinations (bool, optional): also search two-ball combinations in GameEngine.searchShots. Defaults to True.
+        aim_noise (float, optional): standard deviation of the aim angle in degrees, for GameEngine.estimateSuccess. Defaults to 0.5.
+        position_noise (float, optional): standard deviation of the position of the white ball in mm (per axis), for GameEngine.estimateSuccess. Defaults to 3.
+        cushion_noise (float, optional): standard deviation of the angle added by each cushion in degrees, for GameEngine.estimateSuccess. Defaults to 1.
+        samples (int, optional): samples per shot in GameEngine.estimateSuccess. Defaults to 2000.
+        max_samples (int, optional): samples of all shots together in GameEngine.estimateSuccess, bounds its runtime. Defaults to 20000.
     """
 
     group_map = {
@@ -17,13 +32,30 @@ class GameEngine:
         "black": ["eight", "black"]
     }
 
-    def __init__(self, size=(2230,1115), ballDiameter=57):
+    pocket_opening = {"corner": 115, "middle": 130} #: width of the mouth of the pockets in mm, used for the difficulty of shots
+    cushion_penalty = 1.5 #: factor on the difficulty of a shot per cushion, as cushions never reflect perfectly
+
+    def __init__(self, size=(2230,1115), ballDiameter=57, budget=0.01, cushions=2, combinations=True, aim_noise=0.5, position_noise=3, cushion_noise=1, samples=2000, max_samples=20000):
         self.w, self.h = tuple(size)
         w, h = tuple(size)
         
         self.diam = ballDiameter
         d = ballDiameter//2
 
+        self.budget = budget
+        self.cushions = cushions
+        self.combinations = combinations
+        self.aim_noise = aim_noise
+        self.position_noise = position_noise
+        self.cushion_noise = cushion_noise
+        self.samples = samples
+        self.max_samples = max_samples
+
+        # lines the center of a ball bounces off: left, right, top, bottom as axis (0: x, 1: y) and position on that axis
+        r = ballDiameter / 2
+        self.cushion_axis = np.array([0, 0, 1, 1])
+        self.cushion_position = np.array([r, w - r, r, h - r])
+
         holes = [
             (d,d),
             (w//2, 0),
@@ -36,11 +68,21 @@ class GameEngine:
         for h in holes:
             self.holes.append(np.array([h[0], h[1]]))
 
+        # direction from each hole into the table (diagonal for corners) and half of the window the center of a ball must pass through to drop
+        middle = np.array([x == w//2 for x, _ in holes])
+        axis = np.array([[0 if m else np.sign(self.w/2 - x), np.sign(self.h/2 - y)] for (x, y), m in zip(holes, middle)])
+        self.pocket_axis = axis / np.sqrt((axis ** 2).sum(axis=1))[:, None]
+        self.pocket_window = (np.where(middle, self.pocket_opening["middle"], self.pocket_opening["corner"]) - ballDiameter) / 2
+
+        self.simulator = Simulator(size, ballDiameter, self.holes, capture=np.where(middle, self.pocket_opening["middle"], self.pocket_opening["corner"]) / 2)
+
     def getShots(self, data, group="open"):
         """ Calculate all possible first-level (simple) shots. Returns for each ball in the specified group (except white) the coordinate of the white ball and where it should travel to, the coordinate of the ball it will hit and hole this ball will go to. This requires the white ball to exist, else it will return empty.
 
         Calcs based on https://www.real-world-physics-problems.com/physics-of-billiards.html
 
+        All balls get handled at once: the table gets packed into arrays (balls (N,2), holes (6,2)), the hole for every ball, the end positions of the white ball and the obstacles on both paths are computed as broadcast operations over balls x holes and balls x balls. The shots and holes are the same as with the former loop over the balls, the coordinates (like "end-white") are equal up to float rounding.
+
         Args:
             data (dict): coordinates of the balls in the typical coordinate format
             group (optional str): only consider hits for balls in the group. Can be "open" (all balls), "half"/"striped", "full"/"solid", "eight"/"black"
@@ -49,100 +91,418 @@ class GameEngine:
             print(f"The white ball was not found in the data provided to the getShots method of GameEngine.")
             return {}
 
-        print("GAMEENGINE trying with group", group)
-
         white = data["white"]
-        wx, wy = white["x"], white["y"]
-        wvec = np.array([wx,wy])
+        names = list(data.keys())
+        balls = np.array([[c["x"], c["y"]] for c in data.values()], dtype=float) # (N,2)
+        wvec = balls[names.index("white")]
 
-        shots = {}
-        for b, coords in data.items(): # loop over every ball to find each best (simple) shot.
-            if b == "white":
-                continue # dont calculate shots for the white ball...
+        targets = self.groupTargets(names, group)
+        if len(targets) == 0:
+            return {}
+        targets = np.array(targets)
+        bvec = balls[targets] # (M,2)
+        holes = np.array(self.holes, dtype=float) # (6,2)
 
-            if group is not None and BilliardBall.getGroup(b) not in self.group_map[group]:
-                print("GAMEENGINE trying with group", group, BilliardBall.getGroup(b), b)
+        with np.errstate(divide="ignore", invalid="ignore"): # a ball on the white ball has no direction, it gets no valid hole
+            # project every hole onto the line from white through the ball: lambda and the distance of the hole to the line, (M,6)
+            u = bvec - wvec
+            hb = holes[None, :, :] - bvec[:, None, :]
+            lam = (hb * u[:, None, :]).sum(axis=2) / (np.sqrt((u ** 2).sum(axis=1)) ** 2)[:, None] # squared norm taken like np.linalg.norm(u)**2, so the holes get picked exactly as before
+            distances = np.sqrt(((hb - lam[:, :, None] * u[:, None, :]) ** 2).sum(axis=2))
 
-                continue
-
-            x, y = coords["x"], coords["y"]
-            bvec = np.array([x,y])
-
-            u = bvec - wvec # defines the directional vector of a mathematical line
-
-            # find the minimum distance hole, that is behind the ball looking from white
-            distances = []
-            lam = [] # cant use the word lambda, but this is lambda
-            for h in self.holes: # get the distances from every holes to the projected line between white and the ball
-                l = ( np.dot( (h-bvec), u) ) / (np.linalg.norm(u, ord=2) **2)
-                lam.append(l)
-                distances.append( np.linalg.norm( h - bvec - l*u ) )
-            
-            index = None
-            while min(distances) < 1e9:
-                # loop over the distances to find the smallest one that is behind the ball (lambda > 0)
-                d = min(distances)
-                i = distances.index(d)
-                l = lam[i]
-                if l > 0:
-                    index = i
-                    break
-                else:
-                    distances[i] = 1e9 # disable this option and find the next closes hole
-            
-            if index == None:
-                print(f"No valid hit found for {b}, exiting GameEngine.getShots empty.")
-                continue
-            
-            # find the vector from the hole to the ball in the form "g: base + lambda*uh"
-            hole = self.holes[index]
+            # closest hole that is behind the ball looking from white (lambda > 0)
+            behind = lam > 0
+            index = np.argmin(np.where(behind, distances, np.inf), axis=1)
+            valid = behind.any(axis=1)
 
+            # the position the white ball should go to
+            hole = holes[index]
             uh = bvec - hole
-            base = hole
+            len_uh = np.sqrt((uh ** 2).sum(axis=1))
+            endWhite = hole + uh * (len_uh + self.diam)[:, None] / len_uh[:, None]
 
-            # the position the white ball should go to
-            len_uh = np.linalg.norm(uh)
-            endWhite = base + uh * (len_uh + self.diam)/len_uh
-
-            # check, if there is a possible direct shot from the white to the end position of the white ball (near the ball we want to hit)
-            skip_this_ball_flag = False
-            for otherBall, otherCoords in data.items(): # check for all balls...
-                if otherBall in [b, "white"]: # if they are not the balls for which we draw the segment...
-                    continue
-                isInRegion, distance = utils.project_on_segment(utils.coord_to_vec(otherCoords), wvec, endWhite)
-                if not isInRegion: # if they cant be projected onto the line segment, we directly go to the next ball
-                    continue
-                if distance <= self.diam: # if they can be projected onto the line and are at less than one ball diameter distance, the shot is impossible and we break this loop as well as the entire ball
-                    skip_this_ball_flag = True
-                    break
-            if skip_this_ball_flag:
-                continue
+            # every other ball (not the target, not white) must stay clear of the path of the white ball and the path of the ball to the hole
+            others = np.ones((len(targets), len(names)), dtype=bool)
+            others[np.arange(len(targets)), targets] = False
+            others[:, names.index("white")] = False
+            blocked = self.segments_blocked(balls, np.broadcast_to(wvec, bvec.shape), endWhite, others)
+            blocked |= self.segments_blocked(balls, hole, bvec, others)
 
-            # check, if there is a possible direct shot from the ball to the hole
-            for otherBall, otherCoords in data.items(): # check for all balls...
-                if otherBall in [b, "white"]: # if they are not the balls for which we draw the segment...
-                    continue
-                isInRegion, distance = utils.project_on_segment(utils.coord_to_vec(otherCoords), hole, bvec)
-                if not isInRegion: # if they cant be projected onto the line segment, we directly go to the next ball
-                    continue
-                if distance <= self.diam: # if they can be projected onto the line and are at less than one ball diameter distance, the shot is impossible and we break this loop as well as the entire ball
-                    skip_this_ball_flag = True
-                    break
-            if skip_this_ball_flag:
+        shots = {}
+        for m, i in enumerate(targets):
+            b = names[i]
+            if not valid[m]:
+                print(f"No valid hit found for {b}, exiting GameEngine.getShots empty.")
                 continue
-
-            shot = {
+            if blocked[m]:
+                continue
+            h = self.holes[index[m]]
+            shots[b] = {
                 "hole": {
-                    "x": hole[0],
-                    "y": hole[1]
+                    "x": h[0],
+                    "y": h[1]
                 },
-                "ball": coords,
+                "ball": data[b],
                 "end-white": {
-                    "x": endWhite[0],
-                    "y": endWhite[1]
+                    "x": endWhite[m, 0],
+                    "y": endWhite[m, 1]
                 },
                 "white": white
             }
-            shots[b] = shot
-        
         return shots
+
+    def groupTargets(self, names, group):
+        """ Indices of the balls (except white) in the group, see GameEngine.getShots for the groups """
+        return [i for i, b in enumerate(names) if b != "white" and (group is None or group == "open" or BilliardBall.getGroup(b) in self.group_map[group])]
+
+    def segments_blocked(self, balls, starts, ends, mask):
+        """ Check for M line segments at once whether a ball is in the way, like utils.project_on_segment for every segment and ball: a ball blocks a segment if it projects onto the segment and is at most one ball diameter away from it.
+
+        Only the balls inside the bounding box of a segment (grown by a ball diameter) get the exact check.
+
+        Args:
+            balls (np.ndarray): coordinates of all balls (N,2)
+            starts, ends (np.ndarray): ends of the segments (M,2)
+            mask (np.ndarray): which balls to consider for each segment (M,N)
+
+        Returns:
+            np.ndarray: (M,) bool, True if a ball is in the way of the segment
+        """
+        blocked = np.zeros(len(starts), dtype=bool)
+        low = np.minimum(starts, ends) - self.diam - 1
+        high = np.maximum(starts, ends) + self.diam + 1
+        near = mask & (balls[None, :, :] >= low[:, None, :]).all(axis=2) & (balls[None, :, :] <= high[:, None, :]).all(axis=2)
+        m, n = np.nonzero(near)
+        if len(m) == 0:
+            return blocked
+
+        v = ends[m] - starts[m] # one row per (segment, ball) pair
+        nv = np.sqrt((v ** 2).sum(axis=1))[:, None]
+        c = balls[n] - starts[m]
+        alpha = ((v / nv) * (c / nv)).sum(axis=1)
+        distance = np.abs(v[:, 0] * -c[:, 1] - v[:, 1] * -c[:, 0]) / nv[:, 0]
+        blocked[m[(alpha >= 0) & (alpha <= 1) & (distance <= self.diam)]] = True
+        return blocked
+
+    def searchShots(self, data, group="open", k=None):
+        """ Search shots for the balls in the group, in stages: direct shots, bank shots over one and then two cushions (see GameEngine.bankCandidates) and two-ball combinations (see GameEngine.combinationCandidates). Later stages only run for the balls without a shot yet, and only while GameEngine.budget lasts.
+
+        All candidates get scored at once (see GameEngine.difficulty), every ball keeps its easiest shot and only the k easiest of those get returned, easiest first.
+
+        Returns the format of GameEngine.getShots (keyed by the ball to sink) with the "difficulty" of each shot, shots with more than one segment additionally have
+
+        - "type": "bank" or "combination" ("direct" for the others)
+        - "path": coordinates the object ball travels along, from "ball" over the cushion points (or the second ball of a combination) to "hole"
+
+        For a combination, "ball" is the ball the white hits, the key is the ball that goes into the hole.
+
+        Args:
+            data (dict): coordinates of the balls in the typical coordinate format
+            group (optional str): only consider hits for balls in the group, see GameEngine.getShots
+            k (optional int): number of shots to return, None for one per ball
+        """
+        if "white" not in data:
+            print("The white ball was not found in the data provided to the searchShots method of GameEngine.")
+            return {}
+        deadline = time.perf_counter() + self.budget
+
+        white = data["white"]
+        names = list(data.keys())
+        balls = np.array([[c["x"], c["y"]] for c in data.values()], dtype=float) # (N,2)
+        w = names.index("white")
+        group_targets = self.groupTargets(names, group)
+
+        stages = [("direct" if n == 0 else "bank", self.bankCandidates, (n,)) for n in range(self.cushions + 1)]
+        if self.combinations:
+            stages.append(("combination", self.combinationCandidates, (group_targets,)))
+
+        found = [] # (kind, target, first, path, endWhite) per stage
+        targets = group_targets
+        for kind, candidates, args in stages:
+            if len(targets) == 0 or time.perf_counter() > deadline:
+                break
+            with np.errstate(divide="ignore", invalid="ignore"):
+                target, first, path, endWhite = candidates(balls, w, targets, *args)
+            found.append((kind, target, first, path, endWhite))
+            targets = [i for i in targets if i not in set(target)]
+        if sum(len(f[1]) for f in found) == 0:
+            return {}
+
+        # pack all candidates into arrays, paths padded with the hole to four points
+        kind = np.concatenate([np.full(len(f[1]), f[0]) for f in found])
+        target, first, endWhite = [np.concatenate([f[i] for f in found]) for i in (1, 2, 4)]
+        length = np.concatenate([np.full(len(f[1]), f[3].shape[1]) for f in found])
+        path = np.concatenate([np.concatenate([f[3], np.repeat(f[3][:, -1:], 4 - f[3].shape[1], axis=1)], axis=1) for f in found])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            difficulty = self.difficulty(balls[w], endWhite, path, length, kind)
+
+        # easiest shot per ball, then the k easiest balls (partial sort, only the k chosen get sorted)
+        possible = np.nonzero(np.isfinite(difficulty))[0] # e.g. along the cushion into a middle hole
+        order = possible[np.lexsort((difficulty[possible], target[possible]))]
+        best = order[np.unique(target[order], return_index=True)[1]]
+        if k is not None and k < len(best):
+            best = best[np.argpartition(difficulty[best], k - 1)[:k]]
+        best = best[np.argsort(difficulty[best], kind="stable")]
+
+        shots = {}
+        for c in best:
+            b = names[target[c]]
+            shots[b] = {
+                "hole": utils.vec_to_coord(path[c, -1]),
+                "ball": data[names[first[c]]],
+                "end-white": utils.vec_to_coord(endWhite[c]),
+                "white": white,
+                "difficulty": float(difficulty[c])
+            }
+            if kind[c] != "direct":
+                shots[b]["type"] = str(kind[c])
+                shots[b]["path"] = [utils.vec_to_coord(p) for p in path[c, :length[c]]]
+        return shots
+
+    def difficulty(self, white, endWhite, path, length, kind):
+        """ Difficulty of shots, as the inverse of the aiming error the white ball can have for the object ball to still drop (in units of the angle of the pocket window, higher is harder). Computed for all candidates at once from
+
+        - the cut angle: the error of the object ball direction grows with 1/cos of the cut angle
+        - the distance the white travels: the error at the ball grows with it
+        - the distance the object ball travels to the hole (over the cushions) and the acceptance angle of the pocket: the window the ball center must pass, narrowed by the angle the ball comes in relative to the pocket, seen from the ball
+        - combinations amplify the error once more at the second collision, cushions by GameEngine.cushion_penalty each
+
+        Args:
+            white (np.ndarray): coordinate of the white ball (2,)
+            endWhite (np.ndarray): end positions of the white ball (C,2)
+            path (np.ndarray): paths of the object balls, padded with the hole (C,4,2)
+            length (np.ndarray): number of points of each path (C,)
+            kind (np.ndarray): "direct", "bank" or "combination" (C,)
+
+        Returns:
+            np.ndarray: difficulty per candidate (C,)
+        """
+        rows = np.arange(len(path))
+        ball, hole = path[:, 0], path[:, -1]
+        holes = np.array(self.holes, dtype=float)
+        pocket = np.argmin(((hole[:, None, :] - holes[None, :, :]) ** 2).sum(axis=2), axis=1)
+
+        travel_white = np.sqrt(((endWhite - white) ** 2).sum(axis=1))
+        cut = np.radians(self.cutAngle(white, endWhite, ball))
+        travel_ball = np.sqrt(((path[:, 1:] - path[:, :-1]) ** 2).sum(axis=2)).sum(axis=1)
+
+        approach = hole - path[rows, length - 2] # last segment into the hole
+        cos_approach = np.abs((approach * self.pocket_axis[pocket]).sum(axis=1)) / np.sqrt((approach ** 2).sum(axis=1))
+        acceptance = np.arctan(self.pocket_window[pocket] * cos_approach / travel_ball)
+
+        difficulty = travel_white / (self.diam * np.cos(cut) * acceptance)
+
+        # combinations: the error at the second ball, the first ball travels to the ghost ball of the second
+        combination = kind == "combination"
+        second = path[:, 1]
+        u = second - hole
+        ghost = second + u * self.diam / np.sqrt((u ** 2).sum(axis=1))[:, None]
+        cut2 = np.radians(self.cutAngle(ball, ghost, second))
+        amplification = np.sqrt(((ghost - ball) ** 2).sum(axis=1)) / (self.diam * np.cos(cut2))
+        difficulty = np.where(combination, difficulty * amplification, difficulty)
+
+        cushions = np.where(kind == "bank", length - 2, 0)
+        return difficulty * self.cushion_penalty ** cushions
+
+    def estimateSuccess(self, shots, seed=None):
+        """ Estimate the success rate of shots by Monte Carlo sampling: the position of the white ball and the aim angle get perturbed (GameEngine.position_noise, GameEngine.aim_noise), every cushion adds an error (GameEngine.cushion_noise). All samples of all shots are one batch: the white travels along the sampled direction until it touches the ball (ghost ball), the ball leaves along the line of centers (for combinations the same again at the second ball) and has to pass the window of the pocket.
+
+        Other balls in the way are not sampled, GameEngine.searchShots only returns shots that are clear when played exactly.
+
+        The number of samples per shot is GameEngine.samples, but at most GameEngine.max_samples for all shots together, so the runtime stays bounded.
+
+        Adds to each shot `"success": {"rate": 0.83, "low": 0.81, "high": 0.85, "samples": 2000}` with the 95% confidence interval (Wilson) of the rate.
+
+        Args:
+            shots (dict): output of GameEngine.searchShots or GameEngine.getShots, gets changed
+            seed (optional int): seed for the random numbers, for repeatable estimates
+
+        Returns:
+            dict: the shots
+        """
+        if len(shots) == 0:
+            return shots
+        K, n = len(shots), max(min(self.samples, self.max_samples // len(shots)), 1)
+        rng = np.random.default_rng(seed)
+
+        vec = lambda coord: [coord["x"], coord["y"]]
+        paths = [[vec(p) for p in shot.get("path", [shot["ball"], shot["hole"]])] for shot in shots.values()]
+        white = np.array([vec(shot["white"]) for shot in shots.values()], dtype=float)
+        endWhite = np.array([vec(shot["end-white"]) for shot in shots.values()], dtype=float)
+        ball, after = np.array([p[0] for p in paths], dtype=float), np.array([p[1] for p in paths], dtype=float)
+        hole, before = np.array([p[-1] for p in paths], dtype=float), np.array([p[-2] for p in paths], dtype=float)
+        combination = np.array([shot.get("type") == "combination" for shot in shots.values()])
+        cushions = np.array([len(p) - 2 if shot.get("type") == "bank" else 0 for p, shot in zip(paths, shots.values())])
+        travel = np.array([np.sqrt((np.diff(np.array(p[1:] if c else p, dtype=float), axis=0) ** 2).sum(axis=1)).sum() for p, c in zip(paths, combination)]) # distance to the hole after the last collision
+
+        pocket = np.argmin(((hole[:, None, :] - np.array(self.holes)[None, :, :]) ** 2).sum(axis=2), axis=1)
+        approach = hole - before
+        window = self.pocket_window[pocket] * np.abs((approach * self.pocket_axis[pocket]).sum(axis=1)) / np.sqrt((approach ** 2).sum(axis=1))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # white: sampled start and aim (K,n)
+            start = white[:, None, :] + rng.normal(0, self.position_noise, (K, n, 2))
+            aim = endWhite[:, None, :] - start
+            angle = np.arctan2(aim[..., 1], aim[..., 0]) + np.radians(rng.normal(0, self.aim_noise, (K, n)))
+            direction = np.stack([np.cos(angle), np.sin(angle)], axis=2)
+            t, hit = self.rayHit(start, direction, ball[:, None, :])
+            direction = self.unit(ball[:, None, :] - (start + t[..., None] * direction)) # the ball leaves along the line of centers
+
+            # combinations: the first ball hits the second one the same way
+            origin = np.broadcast_to(ball[:, None, :], direction.shape)
+            t2, hit2 = self.rayHit(origin, direction, after[:, None, :])
+            direction2 = self.unit(after[:, None, :] - (origin + t2[..., None] * direction))
+            direction = np.where(combination[:, None, None], direction2, direction)
+            hit &= np.where(combination[:, None], hit2, True)
+
+            # angle between the sampled and the planned direction of the ball going to the hole, cushions add their error
+            planned = self.unit(np.where(combination[:, None], hole - after, after - ball))[:, None, :]
+            error = np.arctan2(planned[..., 0] * direction[..., 1] - planned[..., 1] * direction[..., 0], (planned * direction).sum(axis=2))
+            error += np.radians(rng.normal(0, self.cushion_noise, (K, n))) * np.sqrt(cushions)[:, None]
+            success = hit & (np.cos(error) > 0) & (np.abs(travel[:, None] * np.sin(error)) <= window[:, None])
+
+        rate = success.mean(axis=1)
+        z = 1.96
+        center = (rate + z**2 / (2*n)) / (1 + z**2 / n)
+        half = z * np.sqrt(rate * (1 - rate) / n + z**2 / (4 * n**2)) / (1 + z**2 / n)
+        for shot, r, c, h in zip(shots.values(), rate, center, half):
+            shot["success"] = {"rate": float(r), "low": float(max(c - h, 0)), "high": float(min(c + h, 1)), "samples": n}
+        return shots
+
+    def rayHit(self, origin, direction, center):
+        """ Where a ball moving from origin along direction (unit vectors, (...,2)) touches a ball at center: distance travelled and whether it touches at all (...) """
+        f = origin - center
+        b = (f * direction).sum(axis=-1)
+        disc = b ** 2 - ((f ** 2).sum(axis=-1) - self.diam ** 2)
+        t = -b - np.sqrt(np.maximum(disc, 0))
+        return t, (disc >= 0) & (t > 0)
+
+    def unit(self, v):
+        """ Unit vectors along the last axis """
+        return v / np.sqrt((v ** 2).sum(axis=-1))[..., None]
+
+    def simulate(self, data, shot, speed=2000):
+        """ Predict where the balls end up if the white gets played towards the end position of the white of a shot, with the event-driven Simulator. The trajectories can be drawn as part `{"type": "trajectories", "trajectories": ...}`.
+
+        Args:
+            data (dict): coordinates of the balls in the typical coordinate format
+            shot (dict): shot from GameEngine.getShots or GameEngine.searchShots, or a coordinate to aim the white at
+            speed (float, optional): initial speed of the white in mm/s. Defaults to 2000.
+
+        Returns:
+            dict: see Simulator.simulate
+        """
+        aim = utils.coord_to_vec(shot["end-white"] if "end-white" in shot else shot) - utils.coord_to_vec(data["white"])
+        velocity = aim / np.linalg.norm(aim) * speed
+        return self.simulator.simulate(data, {"white": tuple(velocity)})
+
+    def mirror(self, points, cushion):
+        """ Mirror points (M,2) over the cushions (M,) """
+        mirrored = points.copy()
+        rows = np.arange(len(points))
+        axis = self.cushion_axis[cushion]
+        mirrored[rows, axis] = 2 * self.cushion_position[cushion] - points[rows, axis]
+        return mirrored
+
+    def bankCandidates(self, balls, w, targets, n):
+        """ Shots over n cushions (0 for direct shots) for every target ball into every hole, which are possible: bounce points on the straight parts of the cushions, the white hits the ball at less than 90 degrees and no other ball in the way of the white or the object ball.
+
+        The path gets found by mirroring the hole over the cushions (the last cushion first), the object ball aims at the mirrored hole and bounces where this line crosses the cushion.
+
+        Args:
+            balls (np.ndarray): coordinates of all balls (N,2)
+            w (int): index of the white ball
+            targets (list<int>): indices of the balls to sink
+            n (int): number of cushions
+
+        Returns:
+            np.ndarray, np.ndarray, np.ndarray, np.ndarray: per candidate the index of the ball to sink, the index of the ball the white hits, the path of the object ball (C,n+2,2) and the end position of the white ball (C,2)
+        """
+        sequences = [s for s in itertools.product(range(4), repeat=n) if all(a != b for a, b in zip(s, s[1:]))] # never the same cushion twice in a row
+        holes = np.array(self.holes, dtype=float)
+        T, H, S = len(targets), len(holes), len(sequences)
+        target = np.repeat(np.array(targets), H * S)
+        ball = balls[target]
+        hole = np.tile(np.repeat(holes, S, axis=0), (T, 1))
+        sequence = np.tile(np.array(sequences, dtype=int).reshape(S, n), (T * H, 1))
+        rows = np.arange(len(target))
+
+        # images[j]: the hole mirrored over the cushions j..n-1, where the ball aims at after j bounces
+        images = [hole]
+        for j in reversed(range(n)):
+            images.insert(0, self.mirror(images[0], sequence[:, j]))
+
+        points = [ball]
+        valid = np.ones(len(target), dtype=bool)
+        for j in range(n):
+            axis, position = self.cushion_axis[sequence[:, j]], self.cushion_position[sequence[:, j]]
+            start, aim = points[-1], images[j]
+            t = (position - start[rows, axis]) / (aim[rows, axis] - start[rows, axis])
+            bounce = start + t[:, None] * (aim - start)
+            along = bounce[rows, 1 - axis] # position along the cushion, must be on its straight part, away from the holes
+            valid &= (t > 0) & (t < 1) & (along >= self.diam) & (along <= np.where(axis == 0, self.h, self.w) - self.diam)
+            valid &= (np.sqrt(((bounce[:, None, :] - holes[None, :, :]) ** 2).sum(axis=2)) > self.diam).all(axis=1)
+            points.append(bounce)
+        points.append(hole)
+        path = np.stack(points, axis=1)
+
+        u = path[:, 1] - ball
+        endWhite = ball - u * self.diam / np.sqrt((u ** 2).sum(axis=1))[:, None] # ghost ball
+        valid &= self.cutAngle(balls[w], endWhite, ball) < 90 # measured at the ghost ball, the white must not touch the ball on its way there
+
+        keep = np.nonzero(valid)[0] # only geometrically possible shots get the clearance checks
+        target, path, endWhite = target[keep], path[keep], endWhite[keep]
+        others = self.obstacles(len(balls), len(target), [target, w])
+        blocked = self.segments_blocked(balls, np.broadcast_to(balls[w], endWhite.shape), endWhite, others)
+        for j in range(n + 1):
+            blocked |= self.segments_blocked(balls, path[:, j], path[:, j + 1], others)
+
+        return target[~blocked], target[~blocked], path[~blocked], endWhite[~blocked]
+
+    def combinationCandidates(self, balls, w, targets, group_targets):
+        """ Two-ball combinations: the white hits a ball of the group, which hits the target ball into a hole (directly). Both collisions at less than 90 degrees and no other ball in the way of any of the three paths.
+
+        Args:
+            balls (np.ndarray): coordinates of all balls (N,2)
+            w (int): index of the white ball
+            targets (list<int>): indices of the balls to sink
+            group_targets (list<int>): indices of the balls the white may hit first
+
+        Returns:
+            see GameEngine.bankCandidates, the path is (first ball, ball to sink, hole)
+        """
+        holes = np.array(self.holes, dtype=float)
+        pairs = np.array([(a, b) for b in targets for a in group_targets if a != b], dtype=int).reshape(-1, 2)
+        first = np.repeat(pairs[:, 0], len(holes))
+        target = np.repeat(pairs[:, 1], len(holes))
+        hole = np.tile(holes, (len(pairs), 1))
+        a, b = balls[first], balls[target]
+
+        u = b - hole
+        ghost_b = b + u * self.diam / np.sqrt((u ** 2).sum(axis=1))[:, None] # where the first ball hits the target ball
+        u = a - ghost_b
+        endWhite = a + u * self.diam / np.sqrt((u ** 2).sum(axis=1))[:, None]
+        valid = (self.cutAngle(balls[w], endWhite, a) < 90) & (self.cutAngle(a, ghost_b, b) < 90)
+
+        keep = np.nonzero(valid)[0]
+        first, target, a, b, hole, ghost_b, endWhite = first[keep], target[keep], a[keep], b[keep], hole[keep], ghost_b[keep], endWhite[keep]
+        blocked = self.segments_blocked(balls, np.broadcast_to(balls[w], endWhite.shape), endWhite, self.obstacles(len(balls), len(first), [first, w]))
+        others = self.obstacles(len(balls), len(first), [first, target, w])
+        blocked |= self.segments_blocked(balls, a, ghost_b, others)
+        blocked |= self.segments_blocked(balls, b, hole, others)
+
+        path = np.stack([a, b, hole], axis=1)[~blocked]
+        return target[~blocked], first[~blocked], path, endWhite[~blocked]
+
+    def cutAngle(self, white, ball, aim):
+        """ Angle in degrees between the way of the white onto the ball and the way the ball leaves towards aim, 0 for a straight shot (arrays (M,2), white may be (2,)) """
+        u, v = ball - white, aim - ball
+        cos = (u * v).sum(axis=-1) / np.sqrt((u ** 2).sum(axis=-1) * (v ** 2).sum(axis=-1))
+        return np.degrees(np.arccos(np.clip(cos, -1, 1)))
+
+    def obstacles(self, n, m, exclude):
+        """ Mask (m,n) of the balls that may block m segments, without the balls in exclude (each an index or an array of m indices) """
+        mask = np.ones((m, n), dtype=bool)
+        for e in exclude:
+            mask[np.arange(m), e] = False
+        return mask
@@ -1,11 +1,18 @@
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import json # for testing
+import hashlib
 import os
+import time
+import threading
+import weakref
 import cv2
-from random import randint
 import copy
 import qrcode
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import count
 
 #from .GameEngine import GameEngine
 
@@ -13,6 +20,395 @@ def ie(dic, key, default):
 	""" If key in dic returns value in dic else default """
 	return dic[key] if key in dic else default
 
+image_digests = {} # id of a PIL.Image -> (weak reference to the image, content hash), see image_digest
+
+def image_digest(img):
+	"""Content hash of a PIL image (mode, size and pixels), computed once per image object. Images in parts are treated as read-only (like the ones from ImageAssets), so the hash stays valid as long as the image lives. The entry is checked against a weak reference, so a new image that gets the id of a collected one is hashed again.
+
+	Args:
+		img (PIL.Image): image to hash
+
+	Returns:
+		str: hex digest
+	"""
+	key = id(img)
+	entry = image_digests.get(key)
+	if entry is not None and entry[0]() is img:
+		return entry[1]
+	digest = hashlib.sha1(f"{img.mode} {img.size}".encode() + img.tobytes()).hexdigest()
+	image_digests[key] = (weakref.ref(img, lambda _: image_digests.pop(key, None)), digest)
+	return digest
+
+def part_key(part, keep_alive=None):
+	"""Serialize a `part` into a string that changes whenever its content changes. Used to decide if a cached layer or frame is still valid.
+
+	The `ref` is not part of the key, as it does not change the drawing. Numpy values are converted to python values, PIL images are represented by their content hash (see image_digest). Other objects that are not JSON serializable are represented by their type and id.
+
+	Args:
+		part (dict): `part` of a definition
+		keep_alive (list, optional): objects represented by their id get appended, so a cache can keep them alive and their id can not get reused by another object. Defaults to None.
+	"""
+	def default(obj):
+		if isinstance(obj, (np.generic, np.ndarray)):
+			return obj.tolist()
+		if isinstance(obj, Image.Image):
+			return f"<Image {image_digest(obj)}>"
+		if keep_alive is not None:
+			keep_alive.append(obj)
+		return f"<{type(obj).__name__} at {id(obj)}>"
+	return json.dumps({k: v for k, v in part.items() if k != "ref"}, sort_keys=True, default=default)
+
+def frame_key(keys, size):
+	""" Stable content hash of a whole (normalised) definition: the part keys (see part_key) in drawing order and the image size """
+	return hashlib.sha1(json.dumps([list(size), keys]).encode()).hexdigest()
+
+@lru_cache(maxsize=None)
+def load_font(path, size):
+	""" Process-wide font registry: loads every (font file, size) combination only once. """
+	return ImageFont.truetype(path, size)
+
+class ImageAssets:
+	"""Process-wide, lazily filled store of decoded images (logos, QR codes).
+
+	Each source gets decoded (or generated, for QR codes) on its first request and the same PIL.Image object is handed out afterwards. The images are shared by every GameImage, so treat them as read-only: paste them, but never draw on, resize or thumbnail them in place. Use ImageAssets.thumbnail for scaled variants.
+
+	The module level instance `assets` is the one used by GameImage.
+	"""
+
+	def __init__(self):
+		self.images = {} # source -> decoded PIL.Image
+		self.scaled = {} # (id of the image, size) -> (image, scaled PIL.Image)
+
+	def load(self, source):
+		"""Get the decoded image of a source.
+
+		Args:
+			source (str, PIL.Image): an url (gets turned into a QR code), an absolute file path or an already loaded PIL.Image (returned as is)
+
+		Returns:
+			PIL.Image: the shared, decoded image
+		"""
+		if type(source) is not str:
+			return source
+		if source not in self.images:
+			if source.startswith("http"):
+				self.images[source] = qrcode.make(source).convert("RGBA") # generate a qrcode and change mode from "1" to "RGBA" so it can be pasted
+			else:
+				img = Image.open(source)
+				img.load() # decode now and close the file
+				self.images[source] = img
+		return self.images[source]
+
+	def thumbnail(self, img, size):
+		"""Get a variant of the image scaled down to fit into size (keeping the aspect ratio, like PIL.Image.thumbnail). Each (image, size) combination gets scaled only once.
+
+		Args:
+			img (PIL.Image): image to scale, usually from ImageAssets.load
+			size (tuple<int, int>): maximum width, height
+
+		Returns:
+			PIL.Image: the shared, scaled image
+		"""
+		key = (id(img), tuple(size))
+		if key not in self.scaled or self.scaled[key][0] is not img: # also compare the image itself in case the id got reused
+			scaled = img.copy()
+			scaled.thumbnail(size, Image.Resampling.LANCZOS)
+			self.scaled[key] = (img, scaled)
+		return self.scaled[key][1]
+
+assets = ImageAssets()
+
+class BGRBuffers:
+	"""Pool of preallocated, contiguous uint8 BGR buffers, grouped by shape.
+
+	Exporting a full table frame needs about 7.5 MB. Code that only needs the exported array for a moment (like encoding it) takes a buffer, lets export_bgr write into it and gives it back with BGRBuffers.give once done, instead of allocating a new array every time. Ownership is explicit: arrays that get kept or handed out (frames, trickshot images) are plain arrays and never go through the pool.
+
+	The module level instance `bgr_buffers` is the shared pool.
+
+	Args:
+		size (int, optional): maximum number of free buffers kept per shape. Defaults to 2.
+	"""
+
+	def __init__(self, size=2):
+		self.size = size
+		self.free = {} # shape -> list of free buffers
+
+	def take(self, shape):
+		""" Get a free buffer of the shape (h, w, 3) or allocate a new one """
+		free = self.free.get(tuple(shape), [])
+		if len(free) != 0:
+			return free.pop()
+		return np.empty(shape, dtype=np.uint8)
+
+	def give(self, buffer):
+		"""Hand a buffer back to the pool. Only the owner (whoever took it) may give it back, once it does not use it anymore: the next BGRBuffers.take overwrites it.
+
+		Args:
+			buffer (np.ndarray): buffer from BGRBuffers.take
+		"""
+		free = self.free.setdefault(buffer.shape, [])
+		if len(free) < self.size:
+			free.append(buffer)
+
+bgr_buffers = BGRBuffers()
+
+def export_bgr(img, out=None):
+	"""Export a PIL image (RGBA or RGB) as contiguous BGR np.ndarray for cv2, written straight into a preallocated buffer. The alpha channel gets dropped.
+
+	Args:
+		img (PIL.Image): image to export
+		out (np.ndarray, optional): uint8 buffer of shape (h, w, 3) to write into, like one from `bgr_buffers`. Defaults to a new array.
+
+	Returns:
+		np.ndarray: BGR image (out)
+	"""
+	if out is None:
+		out = np.empty((img.height, img.width, 3), dtype=np.uint8)
+	code = cv2.COLOR_RGBA2BGR if img.mode == "RGBA" else cv2.COLOR_RGB2BGR
+	cv2.cvtColor(np.asarray(img), code, dst=out)
+	return out
+
+class RenderProfile:
+	"""Opt-in profiling of the rendering: wall time and memory per `part` type and per `ref`, aggregated across all GameImage objects and draws.
+
+	Every rasterised layer (see GameImage.render_layer) gets recorded with the time it took and the bytes it allocated for the cached layer (the scratch canvas gets reused, see GameImage.scratch). Times are collected into a histogram with fixed bucket bounds, so it is easy to see which part types (like `balls`, `text`, `possible_shots` or `central_image`) dominate on the hardware. Compositing and frame cache hits get recorded as well.
+
+	The module level instance `render_profile` is the one used by GameImage. It is disabled by default, the Game module enables it from its config and serves GameImage.render_profile.stats() as JSON.
+
+	Args:
+		enabled (bool, optional): record anything at all. Defaults to False.
+		refs_size (int, optional): number of refs kept, the least recently drawn get dropped. Defaults to 256.
+	"""
+	buckets = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000] #: upper bounds of the histogram buckets in ms, the last bucket holds everything above
+
+	def __init__(self, enabled=False, refs_size=256):
+		self.enabled = enabled
+		self.refs_size = refs_size
+		self.lock = threading.Lock() # the Flask server draws from several threads
+		self.reset()
+
+	def reset(self):
+		""" Forget everything recorded so far """
+		with self.lock:
+			self.types = {} # part type -> stats
+			self.refs = OrderedDict() # ref -> stats, LRU
+			self.frames = {"composite": self.new_stats(), "cached": 0}
+
+	def new_stats(self):
+		return {"count": 0, "total_ms": 0., "max_ms": 0., "bytes": 0, "max_bytes": 0, "histogram": [0] * (len(self.buckets) + 1)}
+
+	def add(self, stats, ms, nbytes):
+		stats["count"] += 1
+		stats["total_ms"] += ms
+		stats["max_ms"] = max(stats["max_ms"], ms)
+		stats["bytes"] += nbytes
+		stats["max_bytes"] = max(stats["max_bytes"], nbytes)
+		stats["histogram"][bisect_left(self.buckets, ms)] += 1
+
+	def record_part(self, part, seconds, nbytes):
+		"""Record one rasterised `part`.
+
+		Args:
+			part (dict): `part` of the definition, needs the fields `type` and `ref`
+			seconds (float): wall time
+			nbytes (int): bytes allocated for the part
+		"""
+		ms = seconds * 1000
+		with self.lock:
+			self.add(self.types.setdefault(part["type"], self.new_stats()), ms, nbytes)
+			ref = str(part["ref"])
+			if ref not in self.refs:
+				self.refs[ref] = dict(type=part["type"], **self.new_stats())
+			self.refs.move_to_end(ref)
+			self.add(self.refs[ref], ms, nbytes)
+			if len(self.refs) > self.refs_size:
+				self.refs.popitem(last=False)
+
+	def record_frame(self, seconds=None, nbytes=0):
+		""" Record compositing a frame, or a frame cache hit if seconds is None """
+		with self.lock:
+			if seconds is None:
+				self.frames["cached"] += 1
+			else:
+				self.add(self.frames["composite"], seconds * 1000, nbytes)
+
+	def stats(self):
+		"""Snapshot of everything recorded so far, JSON serializable.
+
+		Returns:
+			dict: `{"enabled": bool, "buckets_ms": [...], "types": {type: stats}, "refs": {ref: stats}, "frames": {...}}`. Each stats dict holds count, total_ms, mean_ms, max_ms, bytes, max_bytes and the histogram (one count per bucket of `buckets_ms`, plus one for everything slower).
+		"""
+		def out(stats):
+			return dict(stats, mean_ms=stats["total_ms"] / stats["count"] if stats["count"] != 0 else 0., histogram=list(stats["histogram"]))
+		with self.lock:
+			return {
+				"enabled": self.enabled,
+				"buckets_ms": self.buckets,
+				"types": {k: out(v) for k, v in sorted(self.types.items(), key=lambda kv: -kv[1]["total_ms"])},
+				"refs": {k: out(v) for k, v in self.refs.items()},
+				"frames": {"composite": out(self.frames["composite"]), "cached": self.frames["cached"]}
+			}
+
+render_profile = RenderProfile()
+
+render_lock = threading.RLock() #: guards the process-wide caches of GameImage (frames, layers, BGR buffers), GameImage objects get drawn from request handlers and the frame sender thread at the same time
+
+class PartStore:
+	"""Ordered store of the `parts` of a GameImage definition.
+
+	The parts are indexed by their reference (field `ref`) in a dict, the drawing order (z-order, first is drawn first) is kept as an explicit list of refs. Looking up, replacing and removing a part by ref does not need to scan the definition. Iterating, len() and indexing by position behave like the plain definition list, so code reading GameImage.definition does not need to know the difference.
+
+	Every part gets a unique ref: parts without one (or with one already taken) get a new ref from a process-wide counter, static parts (see GameImage.static) use their type as ref.
+
+	Args:
+		parts (iterable, optional): `parts` to add in drawing order. The parts get their `ref` field set in place if they have none.
+		static (list, optional): part types that use their type as ref. Defaults to [].
+	"""
+
+	refs = count(1) #: process-wide source of new refs, so automatically assigned refs never collide
+
+	def __init__(self, parts=[], static=[]):
+		self.static = static
+		self.parts = {} # ref -> part
+		self.order = [] # refs in drawing order
+		self.owner = None # the only GameImage allowed to change the store in place, None while it is (or might be) shared, see GameImage.unshare
+		for part in parts:
+			self.add(part)
+
+	def __iter__(self):
+		return (self.parts[ref] for ref in self.order)
+
+	def __len__(self):
+		return len(self.order)
+
+	def __getitem__(self, index):
+		if type(index) is slice:
+			return [self.parts[ref] for ref in self.order[index]]
+		return self.parts[self.order[index]]
+
+	def __add__(self, other):
+		return list(self) + list(other) # like list concatenation, returns a plain list of the parts
+
+	def __radd__(self, other):
+		return list(other) + list(self)
+
+	def __repr__(self):
+		return repr(list(self))
+
+	def get(self, ref, default=None):
+		""" Get the part with the given ref or default if there is none """
+		return self.parts.get(ref, default)
+
+	def index(self, ref):
+		""" Position of the part with the given ref in the drawing order """
+		return self.order.index(ref)
+
+	def allocate_ref(self, part):
+		"""Set a unique ref on the part (in place) if it has none or if its ref is already taken by another part.
+
+		Returns:
+			str, int: the ref of the part
+		"""
+		ref = part.get("ref")
+		if ref is None:
+			ref = part["type"] if part.get("type") in self.static else next(self.refs)
+		while ref in self.parts and self.parts[ref] is not part:
+			ref = next(self.refs)
+		part["ref"] = ref
+		return ref
+
+	def add(self, part, layer=None):
+		"""Add a new part.
+
+		Args:
+			part (dict): `part` to add, gets a ref assigned (see PartStore.allocate_ref)
+			layer (int, optional): position in the drawing order, like list.insert. Defaults to None for appending as the last element (highest layer)
+		"""
+		ref = self.allocate_ref(part)
+		self.parts[ref] = part
+		if layer is None:
+			self.order.append(ref)
+		else:
+			self.order.insert(layer, ref)
+
+	def replace(self, ref, part):
+		""" Replace the part with the given ref, keeping its position in the drawing order. The new part gets the ref assigned. """
+		part["ref"] = ref
+		self.parts[ref] = part
+
+	def remove(self, ref):
+		""" Remove the part with the given ref (if it exists) """
+		if self.parts.pop(ref, None) is not None:
+			self.order.remove(ref)
+
+	def copy(self):
+		""" Copy of the store with copies of the parts (not deep copies of their fields), owned by nobody """
+		clone = PartStore(static=self.static)
+		clone.parts = {ref: part.copy() for ref, part in self.parts.items()}
+		clone.order = self.order.copy()
+		return clone
+
+class Projection:
+	"""Affine transform from table coordinates (mm) to projector pixels, used by GameImage to render directly at the native resolution of the beamer.
+
+	GameImage draws every `part` in table coordinates (1 px = 1 mm). With a Projection, each rasterised layer gets mapped once through the precomputed transform and the frame gets composited at the projector resolution. The beamer does not need to resize and fewer pixels get encoded and sent.
+
+	The transform only scales and shifts (no rotation), so circles drawn in mm stay axis aligned ellipses on the projector, like they are when the beamer stretches the image.
+
+	Args:
+		table (tuple<int, int>): width, height of the table area in mm that fills the projector
+		resolution (tuple<int, int>): width, height of the projector in px
+		offset (tuple<float, float>, optional): position of the table origin on the projector in px. Defaults to (0, 0).
+	"""
+
+	def __init__(self, table=(2230, 1115), resolution=(1920, 1080), offset=(0, 0)):
+		self.table = tuple(table)
+		self.resolution = tuple(resolution)
+		self.matrix = np.array([
+			[resolution[0]/table[0], 0, offset[0]],
+			[0, resolution[1]/table[1], offset[1]]
+		])
+		self.key = [list(self.resolution), self.matrix.tolist()] # part of the frame hash, see frame_key
+
+	@classmethod
+	def from_config(cls, config):
+		"""Build the projection from a module config (like config/config.json).
+
+		Uses the field "beamer-output": `{"mode": "native", "resolution": {"width": 1920, "height": 1080}}`. The beamer stretches the whole GameImage (2230 x 1115 mm) onto the projector, so that is the table area mapped onto the resolution. If "mode" is "table" (the default), GameImage renders in table coordinates and the beamer keeps resizing, so this returns None.
+
+		Args:
+			config (dict): module config
+
+		Returns:
+			Projection or None
+		"""
+		output = config.get("beamer-output", {})
+		if output.get("mode", "table") != "native":
+			return None
+		resolution = output["resolution"]
+		return cls(resolution=(resolution["width"], resolution["height"]))
+
+	def apply(self, x, y):
+		""" Map a point from table coordinates (mm) to projector pixels """
+		X, Y = self.matrix @ np.array([x, y, 1])
+		return X, Y
+
+	def project_layer(self, offset, layer):
+		"""Map a rasterised layer (see GameImage.render_layer) from table coordinates into projector pixels.
+
+		Args:
+			offset (tuple<int, int>): position of the layer in table coordinates
+			layer (PIL.Image): cropped RGBA layer
+
+		Returns:
+			tuple, PIL.Image: position and layer in projector pixels
+		"""
+		x0, y0 = self.apply(*offset)
+		x1, y1 = self.apply(offset[0] + layer.width, offset[1] + layer.height)
+		X0, Y0 = int(np.floor(x0)), int(np.floor(y0))
+		size = (max(int(np.ceil(x1)) - X0, 1), max(int(np.ceil(y1)) - Y0, 1))
+		return (X0, Y0), layer.resize(size, Image.Resampling.BILINEAR) # RGBA gets premultiplied while resampling, no dark fringes
+
 class GameImage:
 	"""Class to generate an image from different game modes and other information
 
@@ -32,13 +428,14 @@ class GameImage:
 
 
 	Attributes:
-		definition: list of `parts`. The first element in the list will get drawn first, with later parts getting drawn above of it (rudimentary layering)
+		definition: list of `parts`, indexed by `ref` as PartStore. The first element in the list will get drawn first, with later parts getting drawn above of it (rudimentary layering)
+		layers: each `part` gets rasterised into its own layer, cached by its `ref`. On a redraw only parts whose content changed get rasterised again, all other layers are reused and just composited.
 	
 	Args:
 		definition (list): `definition` list as specified in the GameImage class documentation
 		size (tuple<int, int>): width, height of the goal image in pixels
 		phys (float): how many meters are 1000 pixels? (equivalent to how many mm are 1 pixel). Not really in use.
-		img_chache (dict): Images that can be used by using in their key as reference, e.g., in a part like `{"type": "text", "text": "Cached Image", "subimg": "key-from-img_cache"}` the `subimg` would be loaded from the file, url (QR-code) or PIL.Image object mapped to the key. Files get loaded upon init and the loaded cache gets copied when the object gets copied (GameImage.copy), minimizing file operations.
+		img_chache (dict): Images that can be used by using in their key as reference, e.g., in a part like `{"type": "text", "text": "Cached Image", "subimg": "key-from-img_cache"}` the `subimg` would be loaded from the file, url (QR-code) or PIL.Image object mapped to the key. Files and QR codes are loaded through the process-wide ImageAssets store (`assets`), so each of them gets decoded/generated only once, no matter how many GameImage objects get created.
 
 	Todo:
 		- Move the GameImage system to its entirely own module/project as an abstraction layer on top of PIL itself.
@@ -46,17 +443,25 @@ class GameImage:
 		- Add GameImage slots to mimize compute needs
 	"""
 
+	text_strips = OrderedDict() #: process-wide LRU cache of rendered text strips, see GameImage.textStrip
+	text_strips_size = 32 #: number of entries kept in GameImage.text_strips
+	frames = OrderedDict() #: process-wide LRU cache of finished frames (canvas, layers, BGR array, JPEG bytes) keyed by the content hash of the definition, see frame_key
+	frames_size = 4 #: number of entries kept in GameImage.frames, each holds about 20 MB for the full table size
+	scratch = {} #: process-wide transparent canvas per size, parts get drawn onto it before their layer is cropped out, see GameImage.render_layer
+	pinned = {} #: process-wide JPEG bytes of the static screens (black, logo and idle screens) by GameImage.scene_key, they never get evicted, see GameImage.pin
+	projection = None #: Projection to render at the native beamer resolution, None to render in table coordinates (1 px = 1 mm). Set process-wide by the Game module from its config.
+
 	def __init__(self, definition=[], size=(2230, 1115), phys=1, img_cache={
 		"isem-logo": "static/images/ISEM-only.png", # small logo without text for subimg display
 		"isem-logo-big": "static/images/isem_logo_big.png", # big logo with text for central display
 		"feedback-form-qr": "https://Example QR Code" # link to the feedback form
 	}):
-		self.img = Image.new(mode="RGBA", size=size, color="#000000ff")
+		self.w, self.h = size
+		self.img = Image.new(mode="RGBA", size=self.output_size(), color="#000000ff")
 		self.ballDiameter = 57 # diameter of a billiard ball (snooker) in mm
 		#self.img = Image.new(mode="RGB", size=size, color="#50b12c")
 		self.draw = ImageDraw.Draw(self.img)
 		self.phys = phys
-		self.w, self.h = size
 		self.current_dir = os.path.dirname(__file__)
 
 		self.FLAG_MODIFIED = False # track if the image has been updated since the last redraw
@@ -67,87 +472,226 @@ class GameImage:
 		self.static = ["balls", "text", "team", "break", "central_image"] #: These `part` types are static and will get reassigned instead of added with a different reference if they are input to GameImage.update_definition, unless a specific reference has been assigned.
 
 		# loading of common referenced images (ISEM logo etc), provide directly
-		self.img_cache = {}
-		for k,v in img_cache.items():
-			if type(v) is str:
-				if v.startswith("http"):
-					self.img_cache[k] = qrcode.make(v).convert("RGBA") # generate a qrcode and change mode from "1" to "RGBA" so it can be pasted
-				else:
-					self.img_cache[k] = Image.open(os.path.join(self.current_dir, v))
-			else:
-				self.img_cache[k] = v
+		# decoded images come from the process-wide asset store, so every file/QR code is only loaded/generated once
+		self.img_cache = {k: assets.load(v if type(v) is not str or v.startswith("http") else os.path.join(self.current_dir, v)) for k,v in img_cache.items()}
+
+		BilliardBall.preloadSprites(int(self.ballDiameter/self.phys), square=True) # only renders on the first GameImage of the process
+
+		self.layers = {} # ref -> (content key, offset, cropped layer) of every rasterised part, see GameImage.render_layer
+		self.composition = None # (ref, content key) of every layer in the current GameImage.img, in drawing order
+		self.frame = None # entry of GameImage.frames for the current GameImage.img
+		self.shared = set() # buffers ("layers") shared with a copy, see GameImage.copy and GameImage.unshare. The definition tracks its owner itself (PartStore.owner)
 
 		self.definition = definition
 		if len(definition) != 0:
 			self.draw_from_dict(definition)
 
+	def output_size(self):
+		""" Size of GameImage.img in px: the projector resolution if GameImage.projection is set, else the table size """
+		return (self.w, self.h) if self.projection is None else self.projection.resolution
+
+	@property
+	def definition(self):
+		""" The `definition` of the image, indexed as PartStore. Assigning a list (or any iterable of `parts`) indexes it, assigning a PartStore uses it as is. Assigning marks the image as modified, so it gets redrawn before it is exported (see GameImage.getImageCV2). """
+		return self.parts
+
+	@definition.setter
+	def definition(self, definition):
+		if type(definition) is PartStore:
+			if definition is not getattr(self, "parts", None):
+				definition.owner = None # might still be used by another GameImage (or a queued copy), the first one to change it copies it
+			self.parts = definition
+		else:
+			self.parts = PartStore(definition, static=self.static)
+			self.parts.owner = self
+		self.FLAG_MODIFIED = True # GameImage.img still shows the previous definition until the next redraw
+
 	def copy(self):
 		"""Generate a copy of the image.
 
-		The loaded cache will get transfered, there are no new file loads for the cache.
+		The copy is copy-on-write: it shares the rendered GameImage.img, the part layers and the definition with this object, nothing gets rendered. Whichever side changes its definition or has to render a layer gets its own buffers first (see GameImage.unshare), so the other side keeps what it had.
 
 		:return: copy of this object
 		:rtype: GameImage
 		"""
-		return GameImage(definition=self.definition.copy(), img_cache=self.img_cache)
+		clone = copy.copy(self) # shallow: only the attribute dict gets copied
+		self.parts.owner = None
+		self.shared = {"layers"}
+		clone.shared = {"layers"}
+		return clone
+
+	def unshare(self, *buffers):
+		"""Give this object its own copy of buffers that are still shared with a copy (copy-on-write, see GameImage.copy). Must be called before changing them in place.
+
+		Args:
+			buffers (str): "definition" (the PartStore and its `parts`, copied unless this object owns it) and/or "layers" (the layer cache dict, the layer images themselves never get changed)
+		"""
+		for buffer in buffers:
+			match buffer:
+				case "definition":
+					if self.parts.owner is not self:
+						self.parts = self.parts.copy() # same content, nothing to redraw
+						self.parts.owner = self
+				case "layers":
+					if "layers" in self.shared:
+						self.shared.discard("layers")
+						self.layers = self.layers.copy()
 
 	def draw_from_dict(self, definition, draw=True):
 		"""Draw the image (GameImage.img) from a list<dictionary> specifying the subparts. Execution flow is from top to bottom, so lower (later) parts are on a higher image layer.
 
+		Every `part` is rasterised into its own layer (see GameImage.render_layer), which is cached by `ref` and only rendered again if the content of the part changed. The layers are then composited onto a black canvas. If the same definition (by content, see frame_key) has been drawn recently by any GameImage, the finished frame from GameImage.frames gets reused and nothing is rasterised.
+
 		Args:
 			definition (list): `definition` list as specified in the class documentation. If an element of the list is `None`, all `parts` in the passed `definition` list will be treated using GameImage.update_definition.
 			draw (bool, optional): Choose if the image should directly be rendered ore only the definition updated. The improvement over just reassigning GameImage.definition is the creation of references.
 
 		Returns:
-			list: `definition` list with assigned references (field `ref`, only for `parts` that had none before)
+			PartStore: `definition` with assigned references (field `ref`, only for `parts` that had none before)
 
 		Todo:
 			- Change match-case statement to dict mapping type to methods
 		"""
-		self.img = Image.new(mode="RGBA", size=(self.w, self.h), color="#000000ff")
-		#self.img = Image.new(mode="RGB", size=size, color="#50b12c")
-		self.draw = ImageDraw.Draw(self.img)
-
 		if None in definition:
 			for part in definition:
 				if part is None: continue
 				self.update_definition(part)
 			return self.definition
 
-		self.definition = definition
-		for part in self.definition:
-			#part["ref"] = ie(part, "ref", randint(0, int(1e6))) if part["type"] not in self.static else part["type"] # random reference id
-			part["ref"] = ie(part, "ref", randint(0, int(1e6)) if part["type"] not in self.static else part["type"])
-
-			if not draw: continue
-
-			match part["type"]:
-				case "balls":
-					self.placeAllBalls(part["coords"])
-				case "text":
-					self.instructionText(part["text"], subimg=(part["subimg"] if "subimg" in part.keys() else None))
-				case "team":
-					self.nameTeamText(parts["player_name"], parts["player_team"])
-				case "break":
-					self.drawBreak(ball=part["draw_ball"])
-				case "central_image":
-					self.centralImage(part["img"])
-				case "line":
-					self.line(part["c1"], part["c2"], color=ie(part, "color", "white"), width=ie(part, "width", 3))
-				case "rectangle":
-					self.rectangle(part["c1"], part["c2"], outline=ie(part, "outline", "white"), width=ie(part, "width", 3), fill=ie(part, "fill", None))
-				case "bullseye":
-					self.bullseye(center=ie(part, "center", None), r=ie(part, "radius", 30))
-				case "polygon":
-					self.draw.polygon(part["points"], fill=ie(part, "fill", None), outline=ie(part, "outline", "white"), width=ie(part, "width", 3))
-				case "arrow_bottom":
-					self.arrow_bottom(**part) # bottom, orientation, length, head_with|line_width|color
-				case "arrow":
-					self.arrow(**part) # needs coords start, end. Otherwise takes same optional arguments as arrow_bottom
-				case "possible_shots":
-					self.drawBallConnections(**part)
+		self.definition = definition # gets indexed as PartStore, which assigns refs
 
-		return self.definition
+		if not draw: # the setter marked the image as modified, the canvas is only rebuilt on the next redraw
+			return self.definition
+
+		with render_lock: # the caches are shared by all GameImage objects, which get drawn from several threads
+			keep_alive = []
+			composition = [(part["ref"], part_key(part, keep_alive)) for part in self.definition]
+			if composition == self.composition: # nothing changed since the last draw
+				self.FLAG_MODIFIED = False
+				return self.definition
+
+			key = frame_key([k for _, k in composition], (self.w, self.h) if self.projection is None else self.projection.key)
+			frame = GameImage.frames.get(key)
+			if frame is not None:
+				# known screen: reuse the finished frame and its layers, nothing gets rasterised
+				GameImage.frames.move_to_end(key)
+				if render_profile.enabled:
+					render_profile.record_frame()
+				self.layers = {ref: layer for (ref, _), layer in zip(composition, frame["layers"])}
+				self.shared.discard("layers")
+				self.img = frame["img"]
+			else:
+				# rasterise only the parts whose content changed since the last draw, reuse the cached layers of all others
+				for part, (ref, k) in zip(self.definition, composition):
+					cached = self.layers.get(ref)
+					if cached is None or cached[0] != k:
+						self.unshare("layers")
+						start = time.perf_counter()
+						self.layers[ref] = (k,) + self.render_layer(part)
+						if render_profile.enabled:
+							layer = self.layers[ref][2]
+							nbytes = 0 if layer is None else layer.width * layer.height * 4 # the cached layer
+							render_profile.record_part(part, time.perf_counter() - start, nbytes)
+
+				# forget layers of removed parts
+				removed = [ref for ref in self.layers.keys() if self.definition.get(ref) is None]
+				if len(removed) != 0:
+					self.unshare("layers")
+				for ref in removed:
+					del self.layers[ref]
+
+				start = time.perf_counter()
+				self.img = Image.new(mode="RGBA", size=self.output_size(), color="#000000ff")
+				for ref, _ in composition:
+					_, offset, layer = self.layers[ref]
+					if layer is not None:
+						self.img.paste(layer, offset, layer) # on the opaque canvas, pasting with the alpha of the layer as mask blends the colors like alpha compositing, at a fraction of the cost
+				if render_profile.enabled:
+					render_profile.record_frame(time.perf_counter() - start, self.img.width * self.img.height * 4)
+
+				frame = {
+					"key": key,
+					"img": self.img,
+					"layers": [self.layers[ref] for ref, _ in composition],
+					"bgr": None, # filled by GameImage.getImageCV2
+					"jpeg": None, # filled by GameImage.getImageJPEG
+					"keep_alive": keep_alive # objects identified by id in the part keys
+				}
+				GameImage.frames[key] = frame
+				if len(GameImage.frames) > self.frames_size:
+					GameImage.frames.popitem(last=False) # drop the least recently used, its arrays get freed once nothing shows them anymore
+
+			self.draw = ImageDraw.Draw(self.img)
+			self.frame = frame
+			self.composition = composition
+			self.FLAG_MODIFIED = False
+			return self.definition
+
+	def render_layer(self, part):
+		"""Rasterise a single `part` into its own layer.
+
+		The part methods draw onto GameImage.img, so the canvas gets swapped for a transparent one (GameImage.scratch) while drawing. Images (sprites, text, logos) get alpha composited by the part methods, so on the transparent canvas they keep their own alpha and blend exactly as if the part was drawn directly onto the image. Colors with transparency (like `"fill": "#ff000080"`) blend with the parts below. The layer gets cropped to its content, so compositing only touches the area the part actually covers. With a GameImage.projection, the cropped layer gets mapped to projector pixels.
+
+		Args:
+			part (dict): `part` of the definition
+
+		Returns:
+			tuple, PIL.Image: offset (x, y) of the layer on GameImage.img and the cropped RGBA layer. The layer is None if the part did not draw anything.
+		"""
+		scratch = GameImage.scratch.pop((self.w, self.h), None)
+		if scratch is None:
+			scratch = Image.new(mode="RGBA", size=(self.w, self.h), color="#00000000")
+		canvas, draw = self.img, self.draw
+		try:
+			self.img, self.draw = scratch, ImageDraw.Draw(scratch)
+			self.draw_part(part)
+		finally:
+			self.img, self.draw = canvas, draw
+
+		bbox = scratch.getbbox() # of the pixels that are not fully transparent
+		if bbox is None:
+			GameImage.scratch[(self.w, self.h)] = scratch
+			return (0, 0), None
+		layer = scratch.crop(bbox)
+		scratch.paste((0, 0, 0, 0), bbox) # transparent again for the next part
+		GameImage.scratch[(self.w, self.h)] = scratch
+		if self.projection is not None:
+			return self.projection.project_layer(bbox[:2], layer)
+		return bbox[:2], layer
+
+	def draw_part(self, part):
+		"""Draw a single `part` onto GameImage.img, dispatched by its type.
+
+		Args:
+			part (dict): `part` of the definition
+		"""
+		match part["type"]:
+			case "balls":
+				self.placeAllBalls(part["coords"])
+			case "text":
+				self.instructionText(part["text"], subimg=(part["subimg"] if "subimg" in part.keys() else None))
+			case "team":
+				self.nameTeamText(part["player_name"], part["player_team"])
+			case "break":
+				self.drawBreak(ball=part["draw_ball"])
+			case "central_image":
+				self.centralImage(part["img"])
+			case "line":
+				self.line(part["c1"], part["c2"], color=ie(part, "color", "white"), width=ie(part, "width", 3))
+			case "rectangle":
+				self.rectangle(part["c1"], part["c2"], outline=ie(part, "outline", "white"), width=ie(part, "width", 3), fill=ie(part, "fill", None))
+			case "bullseye":
+				self.bullseye(center=ie(part, "center", None), r=ie(part, "radius", 30))
+			case "polygon":
+				self.draw.polygon(part["points"], fill=ie(part, "fill", None), outline=ie(part, "outline", "white"), width=ie(part, "width", 3))
+			case "arrow_bottom":
+				self.arrow_bottom(**part) # bottom, orientation, length, head_with|line_width|color
+			case "arrow":
+				self.arrow(**part) # needs coords start, end. Otherwise takes same optional arguments as arrow_bottom
+			case "possible_shots":
+				self.drawBallConnections(**part)
+			case "trajectories":
+				self.drawTrajectories(**part)
 
 	def redraw(self):
 		"""Draw the GameImage.img again using the definition already available as GameImage.definition
@@ -181,44 +725,43 @@ class GameImage:
 		if remove:
 			self.rm_definition(ref)
 			return
+
+		self.unshare("definition")
 		# debug
 		#print("available ref:", [p["ref"] for p in self.definition])
 		#print("this ref:", ref)
 
-		if ref is not None and (ref in [p["ref"] for p in self.definition] or ref in self.static):
-			index = next((index for (index, d) in enumerate(self.definition) if d["ref"] == ref), None)
+		if ref is not None and (self.definition.get(ref) is not None or ref in self.static):
+			part = self.definition.get(ref)
 
-			if ref in self.static and index is None:
+			if ref in self.static and part is None:
 				val["ref"] = ref
-				self.definition.append(val)
+				self.definition.add(val)
 
 			elif not subfield is None:
-				assert subfield in self.definition[index].keys(), f"The given subfield {subfield} does not exist in the part {self.definition[index]['type']} with keys {self.definition[index].keys()}."
+				assert subfield in part.keys(), f"The given subfield {subfield} does not exist in the part {part['type']} with keys {part.keys()}."
 
-				self.definition[index][subfield] = val
+				part[subfield] = val
 
 			else:
-				#print("GI update:", val, "ref:", ref, "index:", index)
-				self.definition[index] = val | {"ref": ref}
-				#print("Success? GI at index:", self.definition[index])
+				#print("GI update:", val, "ref:", ref)
+				self.definition.replace(ref, val | {"ref": ref})
 
 		else: # add a new part at the specified layer (-1 for last, other negative indices are supported too, but always +1)
-			if ref is None:
-				val["ref"] = randint(0, int(1e6)) if ref != None else ref
+			val["ref"] = ref # None gets a new unique ref from the PartStore
 			if layer == -1:
-				self.definition.append(val)
+				self.definition.add(val)
 			else:
 				if layer < 0:
 					layer += 1
-				self.definition.insert(layer, val)
+				self.definition.add(val, layer=layer)
 
 		return self.definition
 
 	def rm_definition(self, ref):
 		""" Remove an element from the definition by ref """
-		index = next((index for (index, d) in enumerate(self.definition) if d["ref"] == ref), None)
-		if index is not None:
-			self.definition.pop(index)
+		self.unshare("definition")
+		self.definition.remove(ref)
 		return self.definition
 
 	def update_text(self, text):
@@ -228,12 +771,54 @@ class GameImage:
 	def getImageCV2(self):
 		"""Exports the GameImage.img (PIL.Image) as a RGB cv2 compatible np.ndarray
 
+		The array is cached with the frame (see GameImage.frames) and shared, so it is read-only. Copy it before changing it.
+
 		Returns:
 			np.ndarray: RGB image
 		"""
-		if self.FLAG_MODIFIED:
-			self.redraw()
-		return np.array(self.img)[:,:,[2,1,0]] # shift from rgb to bgr
+		with render_lock:
+			if self.FLAG_MODIFIED:
+				self.redraw()
+			if self.frame is None: # never drawn
+				return export_bgr(self.img)
+			if self.frame["bgr"] is None:
+				self.frame["bgr"] = export_bgr(self.img) # shift from rgb to bgr
+				self.frame["bgr"].flags.writeable = False # shared by every GameImage showing this frame
+			return self.frame["bgr"]
+
+	def getImageJPEG(self):
+		"""Exports the GameImage.img as JPEG encoded bytes, as posted to the beamer module. The encoded frame is cached with the frame (see GameImage.frames), so a screen that has been shown recently does not get encoded again. Static screens (see GameImage.pin) are neither drawn nor encoded.
+
+		Returns:
+			bytes: JPEG file content
+		"""
+		with render_lock:
+			if len(GameImage.pinned) != 0:
+				jpeg = GameImage.pinned.get(self.scene_key())
+				if jpeg is not None:
+					return jpeg
+			img = self.getImageCV2()
+			if self.frame is None:
+				return cv2.imencode(".jpg", img)[1].tobytes()
+			if self.frame["jpeg"] is None:
+				self.frame["jpeg"] = cv2.imencode(".jpg", img)[1].tobytes()
+			return self.frame["jpeg"]
+
+	def scene_key(self):
+		""" Content hash of the definition in table coordinates, without drawing anything. Unlike the frame key it does not depend on GameImage.projection, so the same scene has the same key on every host (see SceneTransport). """
+		return frame_key([part_key(part) for part in self.definition], (self.w, self.h))
+
+	def pin(self):
+		"""Keep the JPEG of the current definition in GameImage.pinned, so it never gets evicted. GameImage.getImageJPEG of every GameImage with the same definition later on returns it without drawing or encoding. Only the encoded bytes are kept, not the canvas, layers or BGR array of the frame. Meant for the few static screens that get shown again and again, pinned once at startup (after GameImage.projection has been set).
+
+		Returns:
+			tuple<str, bytes>: GameImage.scene_key and JPEG file content of the frame
+		"""
+		key = self.scene_key()
+		jpeg = self.getImageJPEG()
+		with render_lock:
+			GameImage.pinned[key] = jpeg
+		return key, jpeg
 
 	def line(self, c1, c2, color="white", width=3): # TODO: add different coordinate formats
 		"""Draws a line between two points.
@@ -372,10 +957,9 @@ class GameImage:
 		if d == None:
 			d = int(self.ballDiameter/self.phys)
 		
-		b = BilliardBall(n)
-		bImg = b.getImg(d, square=True)
+		bImg = BilliardBall.getSprite(n, d, square=True)
 		x,y = tuple([int(float(i)/self.phys - d//2) for i in pos])
-		self.img.paste(bImg, (x,y), bImg) # second call for mask, so the corners dont get overwritten
+		self.img.alpha_composite(bImg, (x,y)) # blend with the alpha of the sprite, so the corners dont get overwritten
 
 	def placeAllBalls(self, coords, group=False):
 		"""Place all balls mentioned in the data dict on the canvas self.img
@@ -417,7 +1001,7 @@ class GameImage:
 		Part description: `{"type": "possible_shots", "shots": [shots dict]}` + optional fields from GameImage.arrow and GameImage.arrow_bottom
 
 		Args:
-			shots (dict): output of GameEngine.getShots like {"1": {"hole": {"x": 123, "y": 123}, "ball": ..., "end-white": ..., "white": ...}, ...}
+			shots (dict): output of GameEngine.getShots or GameEngine.searchShots like {"1": {"hole": {"x": 123, "y": 123}, "ball": ..., "end-white": ..., "white": ...}, ...}. Shots with a "path" (bank shots, combinations) get an arrow per segment of the path. Shots with a "success" get their success rate written next to the ball.
 			kwargs (optional): arguments passed to GameImage.arrow()
 		"""
 		offset = 35 # 35mm offset to the start and end of the arrow from the passed coordinates
@@ -427,7 +1011,32 @@ class GameImage:
 				color = "#FFFFFF"
 			print("drawBallConnections:", ballName, color)
 			self.arrow(shot["white"], shot["end-white"], offset=offset, color=color, line_width=line_width, head_width=head_width, **kwargs)
-			self.arrow(shot["ball"], shot["hole"], offset=offset, color=color, line_width=line_width, head_width=head_width, **kwargs)
+			path = shot.get("path", [shot["ball"], shot["hole"]])
+			for start, end in zip(path, path[1:]):
+				self.arrow(start, end, offset=offset, color=color, line_width=line_width, head_width=head_width, **kwargs)
+			if "success" in shot: # success rate from GameEngine.estimateSuccess, next to the ball the white hits
+				x, y = shot["ball"]["x"] + self.ballDiameter, shot["ball"]["y"] - self.ballDiameter
+				self.draw.text((x, y), f'{round(shot["success"]["rate"]*100)}%', font=load_font(self.fontpath, 40), fill=color)
+
+	def drawTrajectories(self, trajectories, width=4, **kwargs):
+		""" Takes the trajectories of GameEngine.simulate (Simulator.simulate) and draws the path of every ball that moves, in the color of the ball, with an outline of the ball where it ends up
+
+		Part description: `{"type": "trajectories", "trajectories": {"white": [{"x": 557, "y": 557}, {"x": 1200, "y": 600}], ...}, "width": 4}`
+
+		Args:
+			trajectories (dict): polyline per ball name, as list of coordinates
+			width (int, optional): width of the lines in px. Defaults to 4.
+		"""
+		r = self.ballDiameter / 2
+		for ballName, points in trajectories.items():
+			if len(points) < 2:
+				continue
+			color = BilliardBall.getColor(ballName)
+			if ballName == "eight":
+				color = "#FFFFFF"
+			self.draw.line([(p["x"], p["y"]) for p in points], fill=color, width=width, joint="curve")
+			x, y = points[-1]["x"], points[-1]["y"]
+			self.draw.ellipse((x - r, y - r, x + r, y + r), outline=color, width=width)
 
 	def instructionText(self, text, subimg=None):
 		"""Place text on top and flipped on the bottom of the image. Font size is chosen automatically.
@@ -445,7 +1054,28 @@ class GameImage:
 		:type subimg: optional PIL Image or relative path to image 
 		"""		
 		fs = int(self.h/15)# if self.w/len(text) < # TODO: make it more dynamic 
-		font = ImageFont.truetype(self.fontpath, fs)
+
+		if subimg is None or type(subimg) is str: # PIL images as subimg are not hashable, render those every time
+			img, timg = self.textStrip(("text", text, subimg, self.w, self.h), lambda: self.instructionStrips(text, subimg, fs))
+		else:
+			img, timg = self.instructionStrips(text, subimg, fs)
+
+		self.img.alpha_composite(img, (0,0))
+		#self.img.paste(timg, (0,int(self.h-1.5*fs)), timg)
+		self.img.alpha_composite(timg, (0,int(self.h-3*fs)))
+
+	def instructionStrips(self, text, subimg, fs):
+		"""Render the strips for GameImage.instructionText: the text (and subimg) for the top and the same strip rotated by 180 degrees for the bottom.
+
+		Args:
+			text (str): Text to be placed
+			subimg (PIL.Image, str, None): Image to be placed directly under the text
+			fs (int): font size
+
+		Returns:
+			PIL.Image, PIL.Image: top strip and bottom strip
+		"""
+		font = load_font(self.fontpath, fs)
 
 		#img = Image.new(mode="RGBA", size=(self.w, int(1.5*fs)), color="#00000000")
 		img = Image.new(mode="RGBA", size=(self.w, int(3*fs)), color="#00000000")
@@ -458,8 +1088,8 @@ class GameImage:
 					subimg = self.img_cache[subimg]
 				else:
 					# load from file
-					subimg = Image.open(self.current_dir + "/" + subimg)
-			subimg.thumbnail(size, Image.Resampling.LANCZOS)
+					subimg = assets.load(self.current_dir + "/" + subimg)
+			subimg = assets.thumbnail(subimg, size) # scaled variant, the shared image itself must not be shrunk
 			w,h = subimg.size
 			img.paste(subimg, ((self.w-w)//2, int(1.5*fs)))
 
@@ -479,10 +1109,7 @@ class GameImage:
 		else:
 			draw.text((center, 0), text, font=font, fill="white", background="#00000000")
 
-		self.img.paste(img, (0,0), img)
-		timg = img.transpose(Image.ROTATE_180)
-		#self.img.paste(timg, (0,int(self.h-1.5*fs)), timg)
-		self.img.paste(timg, (0,int(self.h-3*fs)), timg)
+		return img, img.transpose(Image.ROTATE_180)
 
 	def nameTeamText(self, name, team):
 		"""Put the name and team on the right side of the image, oriented outwards.
@@ -494,17 +1121,42 @@ class GameImage:
 			team (str): Team name
 		"""
 		fs = int(self.h//25)
-		font = ImageFont.truetype(self.fontpath, fs)
-		img = Image.new(mode="RGBA", size=(self.h, int(1.5*fs)), color="#00000000")
-		draw = ImageDraw.Draw(img)
 
-		_,_, wn,hn = draw.textbbox((0,0), name, font=font)
-		_,_, wt,ht = draw.textbbox((0,0), team, font=font)
-		draw.text((self.h//4 - wn//2, 0), name, font=font, fill="white", background="#00000000")
-		draw.text((3*self.h//4 - wt//2, 0), team, font=font, fill="white", background="#00000000")
+		def render():
+			font = load_font(self.fontpath, fs)
+			img = Image.new(mode="RGBA", size=(self.h, int(1.5*fs)), color="#00000000")
+			draw = ImageDraw.Draw(img)
+
+			_,_, wn,hn = draw.textbbox((0,0), name, font=font)
+			_,_, wt,ht = draw.textbbox((0,0), team, font=font)
+			draw.text((self.h//4 - wn//2, 0), name, font=font, fill="white", background="#00000000")
+			draw.text((3*self.h//4 - wt//2, 0), team, font=font, fill="white", background="#00000000")
 
-		timg = img.transpose(Image.ROTATE_90)
-		self.img.paste(timg, (self.w - int(1.5*fs),0), timg)
+			return img.transpose(Image.ROTATE_90)
+
+		timg = self.textStrip(("team", name, team, self.w, self.h), render)
+		self.img.alpha_composite(timg, (self.w - int(1.5*fs),0))
+
+	def textStrip(self, key, render):
+		"""Get finished text strips from the process-wide LRU cache GameImage.text_strips or render and cache them. Most redraws show the same text, so the strips rarely have to be rendered.
+
+		The returned strips are shared: only paste them, never draw on them.
+
+		Args:
+			key (tuple): hashable description of everything the strips depend on, like (part type, text, subimg, width, height)
+			render (callable): renders the strips if they are not cached
+
+		Returns:
+			any: the output of render
+		"""
+		strips = GameImage.text_strips
+		if key in strips:
+			strips.move_to_end(key)
+			return strips[key]
+		strips[key] = render()
+		if len(strips) > self.text_strips_size:
+			strips.popitem(last=False) # drop the least recently used
+		return strips[key]
 
 	def drawBreak(self, ball=True):
 		""" Draw the basic triangle for a break and optionally the white ball for break
@@ -541,14 +1193,14 @@ class GameImage:
 			if img in self.img_cache.keys():
 				img = self.img_cache[img]
 			else:
-				img = Image.open(img, ) # TODO: is this the correct file path format?
+				img = assets.load(img) # TODO: is this the correct file path format?
 		w, h = img.size
 		#print("CENTRAL IMAGE", w, h)
 		if img.mode == "1": # black and white qr codes
 			#print(img.size)
 			self.img.paste(img, ((self.w - w)//2, (self.h - h)//2))
 		else:
-			self.img.paste(img, ((self.w - w)//2, (self.h - h)//2), mask=img.split()[3])
+			self.img.alpha_composite(img, ((self.w - w)//2, (self.h - h)//2))
 
 
 				
@@ -563,6 +1215,7 @@ class BilliardBall:
 
 	Attributes:
 		colors (list): list of all colors (hexcodes strings) ordered 
+		sprites (dict): process-wide cache of rendered ball images, mapping (number, diameter, square) to the PIL.Image. See BilliardBall.getSprite.
 
 
 	Args:
@@ -578,6 +1231,7 @@ class BilliardBall:
 		"correct": 18,
 		"incorrect": 19
 	}
+	sprites = {}
 
 	def __init__(self, n):
 		current_dir = os.path.dirname(__file__) # finding the Roboto-Black.ttf/navigating the dirs
@@ -624,6 +1278,37 @@ class BilliardBall:
 			group = "half" if (n>8 and n<16) else "full"
 		return group
 
+	@classmethod
+	def getSprite(cls, n, d, square=False):
+		"""Get the image of a ball from the process-wide sprite cache. Each (number, diameter, square) combination is only rendered once with BilliardBall.getImg, all later calls return the same image.
+
+		The returned image is shared: only read or paste it, never draw on it. Use BilliardBall.getImg for an image of your own.
+
+		Args:
+			n (int, str): number or name of the ball
+			d (int): Diameter of the returned image (side of square) in px
+			square (bool, optional): see BilliardBall.getImg. Defaults to False.
+
+		Returns:
+			PIL.Image: the cached image of the ball
+		"""
+		n = int(n) if n not in cls.unique_map.keys() else cls.unique_map[n]
+		key = (n, d, square)
+		if key not in cls.sprites:
+			cls.sprites[key] = cls(n).getImg(d, square=square)
+		return cls.sprites[key]
+
+	@classmethod
+	def preloadSprites(cls, d, square=False):
+		"""Render the sprites of all balls (1-15, white and the special balls 17-19) for one diameter into the cache, so no ball has to be rendered during a game.
+
+		Args:
+			d (int): Diameter of the ball images in px
+			square (bool, optional): see BilliardBall.getImg. Defaults to False.
+		"""
+		for n in range(1, len(cls.colors) + 1):
+			cls.getSprite(n, d, square=square)
+
 	def getImg(self, d, square=False):
 		"""Get the image of the ball with its number, half or full and color.
 		
@@ -633,7 +1318,7 @@ class BilliardBall:
 		:type square: optional, bool
 		:return: PIL.Image object
 		"""
-		self.font = ImageFont.truetype(self.fontpath, d//3)
+		self.font = load_font(self.fontpath, d//3)
 		
 		img = Image.new(mode="RGBA", size=(d+1, d+1))
 		draw = ImageDraw.Draw(img)
@@ -694,7 +1379,7 @@ class Trickshot:
 		return self.img # transform to cv2
 
 	def getTrickshotImageCV2(self):
-		return np.array(self.getTrickshotImage(self))[:,:,[2,1,0]]
+		return export_bgr(self.getTrickshotImage()) # a new array, owned by the caller
 
 	def getHitHints(self, d=100):
 		"""Hit hints are hints on where to hit the ball (shown from the back) to get a desired trajectory like backspin.
@@ -768,10 +1453,8 @@ class Trickshot:
 			ball = allBalls[number]
 			if anonymize and not number == "white":
 				number = 17 # a dummy ball that does not really exist
-			b = BilliardBall(number)
-
 			offset = diameter // 2
-			bImg = b.getImg(diameter, square=True) # currently hardcoded ball diameter
+			bImg = BilliardBall.getSprite(number, diameter, square=True) # currently hardcoded ball diameter
 			
 			xCorner, yCorner = int(ball["x"])-offset, int(ball["y"])-offset
 			self.img.paste(bImg, (xCorner, yCorner), bImg)
@@ -0,0 +1,95 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+class Pipeline:
+    """ Runs the remote calls of one request (camera, beamer, sounds) as named stages on a shared thread pool. Independent stages run in parallel, a stage only waits for the stages it declares in `after`.
+
+    .. code:: python3
+
+        p = Pipeline()
+        p.run("sound", self.beamer_play_sound, "please_dont_touch_the_balls")
+        p.run("capture", self.camera_capture, self.camera.get_coords) # in parallel to the sound
+        p.run("finished", self.beamer_play_sound, "finished", after=["capture"])
+        coords = p.result("capture")
+        timings = p.wait()
+
+    A stage whose dependency failed does not run and fails as well. Pipeline.result re-raises the exception of a stage.
+
+    Stages never block a pool thread while waiting for their dependencies, they get submitted once the dependencies are done, so the pool can not deadlock on itself.
+    """
+    executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="pipeline") #: process-wide pool for all pipelines
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {} # name -> Future
+        self.timings = {} # name -> {"start_ms", "end_ms", "ms"} relative to the creation of the pipeline
+        self.lock = threading.Lock()
+
+    def run(self, name, fn, *args, after=[], **kwargs):
+        """ Add a stage and start it as soon as the stages in `after` finished.
+
+        Args:
+            name (str): unique name of the stage, used in `after` of other stages and in the timings
+            fn (callable): the call to run, gets `*args` and `**kwargs`
+            after (list<str>, optional): names of stages that must finish before this one starts. Defaults to [].
+
+        Returns:
+            concurrent.futures.Future: result of the stage
+        """
+        future = Future()
+        self.stages[name] = future
+        dependencies = [self.stages[d] for d in after]
+        remaining = [len(dependencies)]
+
+        def submit(_=None):
+            with self.lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+            if any(d.exception() is not None for d in dependencies):
+                future.set_exception(RuntimeError(f"stage {name} did not run, a stage it depends on ({', '.join(after)}) failed"))
+                return
+            self.executor.submit(self.execute, name, future, fn, args, kwargs)
+
+        if len(dependencies) == 0:
+            remaining[0] = 1
+            submit()
+        for d in dependencies:
+            d.add_done_callback(submit)
+        return future
+
+    def execute(self, name, future, fn, args, kwargs):
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            error = e
+        end = time.perf_counter()
+        with self.lock: # record before resolving, so the timing is there once a waiter wakes up
+            self.timings[name] = {"start_ms": (start - self.start) * 1000, "end_ms": (end - self.start) * 1000, "ms": (end - start) * 1000}
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def result(self, name, timeout=None):
+        """ Wait for a stage and return its result, raises its exception """
+        return self.stages[name].result(timeout=timeout)
+
+    def wait(self, timeout=None):
+        """ Wait for all stages. Failed stages get printed, not raised (use Pipeline.result for that).
+
+        Returns:
+            dict: per stage timings in ms relative to the creation of the pipeline (start_ms, end_ms, ms) and the total ("total_ms")
+        """
+        for name, future in self.stages.items():
+            try:
+                future.result(timeout=timeout)
+            except Exception as e:
+                print(f"Stage {name} failed: {e}")
+        with self.lock:
+            timings = dict(self.timings)
+        timings["total_ms"] = (time.perf_counter() - self.start) * 1000
+        return timings
@@ -0,0 +1,101 @@
+import copy
+import json
+import numpy as np
+from .GameImage import GameImage, part_key
+
+""" This file supplies the scene transport: instead of a rendered JPEG frame, the Game module sends the `definition` of the GameImage (or only the parts that changed) and the beamer renders it locally with the same GameImage code.
+
+A scene message is a JSON dict
+
+.. code:: python3
+
+    message = {
+        "version": 1, # SceneTransport.VERSION, a receiver rejects other versions
+        "key": "3f2a...", # GameImage.scene_key of the complete scene
+        "base": "91bc..." or None, # key of the scene the receiver must currently hold for this delta, None for a complete scene
+        "order": ["text", 17, "balls", 18], # refs of all parts in drawing order
+        "parts": [{"type": "text", "text": "...", "ref": "text"}] # parts that are new or changed compared to the base
+    }
+
+The receiver (SceneRenderer) answers 200 if it applied the scene, 409 if it does not hold the base (the sender then sends the complete scene). Peers that answer 404 or 405 do not support scenes and get JPEG frames instead, see Game.beamer_send_frame.
+"""
+
+VERSION = 1
+
+def json_part(obj):
+    """ JSON fallback for parts: numpy values get converted, everything else (e.g. PIL images) can not be sent as scene """
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    raise TypeError(f"{type(obj).__name__} can not be part of a scene")
+
+def scene_message(gameimage, base=None):
+    """ Build the scene message for a GameImage.
+
+    Args:
+        gameimage (GameImage): image to send, does not get drawn
+        base (dict, optional): state returned with the last scene the receiver acknowledged. If given, only parts that changed since then get sent. Defaults to None.
+
+    Returns:
+        dict, dict: the message and the state to pass as `base` next time. (None, None) if a part can not be serialized, then the frame has to be sent as JPEG.
+    """
+    keys = {}
+    changed = []
+    for part in gameimage.definition:
+        keys[part["ref"]] = part_key(part)
+        if base is not None and base["parts"].get(part["ref"]) == keys[part["ref"]]:
+            continue
+        try:
+            changed.append(json.loads(json.dumps(part, default=json_part)))
+        except TypeError:
+            return None, None
+    key = gameimage.scene_key()
+    message = {
+        "version": VERSION,
+        "key": key,
+        "base": None if base is None else base["key"],
+        "order": list(keys.keys()),
+        "parts": changed
+    }
+    return message, {"key": key, "parts": keys}
+
+class SceneRenderer:
+    """ Receiving side of the scene transport, renders scene messages (see scene_message) with a GameImage. Meant to run on the beamer module, which shows SceneRenderer.gameimage after each accepted message.
+
+    The rasterised layers are cached by ref in the GameImage, so a delta only rasterises the parts that changed.
+
+    Args:
+        **kwargs: passed to GameImage
+    """
+
+    def __init__(self, **kwargs):
+        self.gameimage = GameImage(**kwargs)
+        self.key = None # key of the scene currently shown
+        self.parts = {} # ref -> part of the scene currently shown
+
+    def receive(self, message):
+        """ Apply a scene message and draw it.
+
+        Args:
+            message (dict): scene message
+
+        Returns:
+            dict, int: response and http status code. 200 if the scene is drawn, 409 if the base of a delta is not the current scene, 400 for an unsupported version.
+        """
+        if message.get("version") != VERSION:
+            return {"error": f"unsupported scene version {message.get('version')}"}, 400
+        if message["base"] is not None and message["base"] != self.key:
+            return {"error": "scene base does not match", "key": self.key}, 409
+
+        parts = dict(self.parts) if message["base"] is not None else {}
+        for part in message["parts"]:
+            parts[part["ref"]] = part
+        if any(ref not in parts for ref in message["order"]):
+            return {"error": "scene is missing parts", "key": self.key}, 409
+
+        self.gameimage.draw_from_dict([copy.copy(parts[ref]) for ref in message["order"]])
+        self.parts = {ref: parts[ref] for ref in message["order"]}
+        self.key = self.gameimage.scene_key()
+        if self.key != message["key"]: # should not happen, but never show a wrong scene twice
+            self.key = None
+            return {"error": "scene key does not match after applying"}, 409
+        return {"key": self.key}, 200
@@ -0,0 +1,221 @@
+import numpy as np
+
+class Simulator:
+    """ Event-driven simulation of rolling balls on the table, to predict where the balls of a shot end up.
+
+    Balls roll in a straight line and slow down with a constant deceleration (rolling friction, no spin or sliding), so their positions are quadratic in time. Instead of fixed time steps, the simulation jumps from event to event:
+
+    - ball-ball collision: the time two balls touch solves a quartic (|relative position|² = diameter²), solved for all pairs of a ball at once (companion matrices)
+    - ball-cushion collision: a quadratic along the axis of the cushion
+    - pocket capture: the ball center comes within the capture radius of a hole (quartic like a collision with a ball at rest)
+    - stop: the ball comes to rest
+
+    Predicted times are absolute, so after an event only the predictions of the balls involved get computed again. The holes are handled as resting bodies after the balls, so collisions and captures are one batch.
+
+    Collisions are frictionless and the balls have equal mass: the velocity components along the line of centers get exchanged (with the ball restitution), a cushion reflects the component perpendicular to it (with the cushion restitution).
+
+    Args:
+        size (tuple, optional): width and height of the table in mm. Defaults to (2230,1115).
+        ballDiameter (int, optional): diameter of the balls in mm. Defaults to 57.
+        holes (list<np.ndarray>, optional): coordinates of the holes. Defaults to None, the holes of GameEngine.
+        capture (list<float>, optional): capture radius per hole in mm, a ball whose center comes that close drops. Defaults to None, 57.5 for every hole (half the mouth of a corner pocket).
+        deceleration (float, optional): deceleration of rolling balls in mm/s². Defaults to 150.
+        ball_restitution (float, optional): restitution of ball-ball collisions. Defaults to 0.93.
+        cushion_restitution (float, optional): restitution of the cushions. Defaults to 0.75.
+        max_events (int, optional): events after which the simulation stops. Defaults to 5000.
+        max_time (float, optional): seconds after which the simulation stops. Defaults to 60.
+    """
+
+    def __init__(self, size=(2230,1115), ballDiameter=57, holes=None, capture=None, deceleration=150, ball_restitution=0.93, cushion_restitution=0.75, max_events=5000, max_time=60):
+        self.w, self.h = tuple(size)
+        self.diam = ballDiameter
+        r = ballDiameter / 2
+        if holes is None:
+            d = ballDiameter//2
+            holes = [(d, d), (self.w//2, 0), (self.w-d, d), (d, self.h-d), (self.w//2, self.h), (self.w-d, self.h-d)]
+        self.holes = np.array(holes, dtype=float)
+        self.capture = np.full(len(self.holes), 57.5) if capture is None else np.array(capture, dtype=float)
+        self.deceleration = deceleration
+        self.ball_restitution = ball_restitution
+        self.cushion_restitution = cushion_restitution
+        self.max_events = max_events
+        self.max_time = max_time
+
+        # lines the center of a ball bounces off: left, right, top, bottom as axis (0: x, 1: y) and position on that axis
+        self.cushion_axis = np.array([0, 0, 1, 1])
+        self.cushion_position = np.array([r, self.w - r, r, self.h - r])
+
+    def simulate(self, data, velocities):
+        """ Simulate until all balls rest (or Simulator.max_events / Simulator.max_time are reached).
+
+        Args:
+            data (dict): coordinates of the balls in the typical coordinate format
+            velocities (dict): initial velocity (vx, vy) in mm/s per ball name, e.g. {"white": (3000, 150)}, all other balls rest
+
+        Returns:
+            dict: `{"trajectories": {"white": [{"x": 557, "y": 557}, ...], ...}, "final": {...}, "pocketed": ["3", ...], "events": 123, "time": 4.2}` with the polyline of every ball (start, every change of direction, end), the resting positions of the balls left on the table, the pocketed balls in order, the number of events and the simulated seconds
+        """
+        self.names = list(data.keys())
+        N = len(self.names)
+        r = self.diam / 2
+        # bodies: the balls, then the holes (resting, contact at the capture radius). p and v are views on the balls.
+        self.positions = np.concatenate([np.array([[c["x"], c["y"]] for c in data.values()], dtype=float).reshape(N, 2), self.holes])
+        self.velocities = np.zeros_like(self.positions)
+        self.p, self.v = self.positions[:N], self.velocities[:N]
+        self.p[:] = np.clip(self.p, [r, r], [self.w - r, self.h - r]) # detected positions can be slightly outside the cushions
+        self.v[:] = np.array([velocities.get(n, (0, 0)) for n in self.names], dtype=float).reshape(N, 2)
+        self.reach_distance = np.concatenate([np.full(N, float(self.diam)), self.capture])
+        self.live = np.ones(len(self.positions), dtype=bool) # balls still on the table and the holes
+        self.active = self.live[:N]
+        self.t = 0.0
+
+        self.contact_times = np.full((N, len(self.positions)), np.inf) # ball x (balls, holes)
+        self.wall_times = np.full((N, 5), np.inf) # ball x (4 cushions, stop)
+        with np.errstate(divide="ignore", invalid="ignore"): # resting balls divide by their speed of 0, the results get masked
+            self.predict(np.arange(N))
+
+            trajectories = [[self.p[i].copy()] for i in range(N)]
+            pocketed = []
+            events = 0
+            while events < self.max_events and N != 0:
+                contact = np.unravel_index(np.argmin(self.contact_times), self.contact_times.shape)
+                wall = np.unravel_index(np.argmin(self.wall_times), self.wall_times.shape)
+                is_contact = self.contact_times[contact] <= self.wall_times[wall]
+                i, j = contact if is_contact else wall
+                t = self.contact_times[contact] if is_contact else self.wall_times[wall]
+                if t == np.inf or t > self.max_time:
+                    break
+                self.advance(t - self.t)
+                self.t = t
+                events += 1
+
+                involved = np.array([i])
+                if is_contact and j < N: # ball-ball
+                    involved = np.array([i, j])
+                    self.collide(i, j)
+                elif is_contact: # captured by hole j - N
+                    self.active[i] = False
+                    self.v[i] = 0
+                    pocketed.append(self.names[i])
+                elif j < 4: # cushion
+                    self.v[i, self.cushion_axis[j]] *= -self.cushion_restitution
+                else: # stop
+                    self.v[i] = 0
+
+                for k in involved:
+                    if not np.array_equal(trajectories[k][-1], self.p[k]):
+                        trajectories[k].append(self.p[k].copy())
+                self.predict(involved)
+
+        for i in range(N): # balls still moving at the end
+            if not np.array_equal(trajectories[i][-1], self.p[i]):
+                trajectories[i].append(self.p[i].copy())
+
+        return {
+            "trajectories": {n: [{"x": float(x), "y": float(y)} for x, y in trajectory] for n, trajectory in zip(self.names, trajectories)},
+            "final": {n: {"name": n, "x": float(self.p[i, 0]), "y": float(self.p[i, 1])} for i, n in enumerate(self.names) if self.active[i]},
+            "pocketed": pocketed,
+            "events": events,
+            "time": self.t
+        }
+
+    def advance(self, dt):
+        """ Move all balls dt seconds along their (decelerating) straight paths """
+        speed = np.sqrt((self.v ** 2).sum(axis=1))
+        moving = speed > 0
+        dt = np.minimum(dt, np.where(moving, speed / self.deceleration, 0))
+        unit = np.where(moving[:, None], self.v / np.where(moving, speed, 1)[:, None], 0)
+        self.p += unit * (speed * dt - 0.5 * self.deceleration * dt ** 2)[:, None]
+        self.v[:] = unit * np.maximum(speed - self.deceleration * dt, 0)[:, None]
+
+    def collide(self, i, j):
+        """ Exchange the velocity components of ball i and j along their line of centers """
+        n = self.p[j] - self.p[i]
+        n /= np.sqrt((n ** 2).sum())
+        dv = (self.v[j] - self.v[i]) @ n
+        self.v[i] += (1 + self.ball_restitution) / 2 * dv * n
+        self.v[j] -= (1 + self.ball_restitution) / 2 * dv * n
+
+    def motion(self):
+        """ Per body: speed, quadratic coefficient of the position (2,) and the time until it rests (infinite for resting bodies) """
+        speed = np.sqrt((self.velocities ** 2).sum(axis=1))
+        moving = speed > 0
+        unit = self.velocities / np.where(moving, speed, 1)[:, None]
+        return speed, -0.5 * self.deceleration * unit, np.where(moving, speed / self.deceleration, np.inf)
+
+    def predict(self, balls):
+        """ Compute the next events of the balls (array of indices) again: collisions with all other balls and captures by the holes, cushions and stopping, as absolute times """
+        speed, a, rest = self.motion()
+        moving = speed[balls] > 0
+        v, p = self.v[balls], self.p[balls]
+
+        # cushions: the path length s(t) = speed*t - deceleration*t²/2 to the cushion along its axis, then stopping
+        unit = (v / speed[balls, None])[:, self.cushion_axis]
+        s = (self.cushion_position - p[:, self.cushion_axis]) / unit
+        disc = speed[balls, None] ** 2 - 2 * self.deceleration * s
+        t = 2 * s / (speed[balls, None] + np.sqrt(disc))
+        hit = (s > 1e-9) & (disc >= 0) & moving[:, None]
+        self.wall_times[balls, :4] = np.where(hit, self.t + t, np.inf)
+        self.wall_times[balls, 4] = np.where(moving, self.t + rest[balls], np.inf)
+
+        # every other body: balls and holes, in one batch. Only up to the next cushion or stop of either ball, as that event predicts the pair again anyway.
+        m, n = len(balls), len(self.positions)
+        walls = np.concatenate([self.wall_times.min(axis=1), np.full(n - len(self.p), np.inf)])
+        window = np.minimum(walls[balls, None], walls[None, :]) - self.t
+        t = self.contact(
+            (a[balls, None, :] - a[None, :, :]).reshape(-1, 2),
+            (v[:, None, :] - self.velocities[None, :, :]).reshape(-1, 2),
+            (p[:, None, :] - self.positions[None, :, :]).reshape(-1, 2),
+            np.broadcast_to(self.reach_distance, (m, n)).reshape(-1),
+            window.reshape(-1)
+        ).reshape(m, n)
+        t = np.where(self.live[None, :] & self.active[balls, None] & (np.arange(n)[None, :] != balls[:, None]), self.t + t, np.inf)
+        self.contact_times[balls] = t
+        self.contact_times[:, balls] = t[:, :len(self.p)].T
+
+        inactive = balls[~self.active[balls]]
+        self.wall_times[inactive] = np.inf
+
+    def contact(self, A, B, C, D, window):
+        """ First time t in [0, window] at which |A t² + B t + C| = D while the distance shrinks, infinite if there is none. A, B, C are (M,2), D and window (M,).
+
+        Rows that can not get that close get skipped: the closest approach of the motion without deceleration (B t + C) is off by at most |A| window². For the others, |A t² + B t + C|² - D² is a quartic in t. Its roots get computed as eigenvalues of the companion matrices of all quartics at once and refined with a Newton step. Without a quadratic term (A = 0, e.g. relative to a resting ball with the same deceleration) it is a quadratic and gets solved directly.
+        """
+        t = np.full(len(A), np.inf)
+        AA, AB, AC, BB, BC, CC = (np.einsum("ij,ij->i", X, Y) for X, Y in ((A, A), (A, B), (A, C), (B, B), (B, C), (C, C)))
+        closest = np.clip(np.where(BB > 0, -BC / BB, 0), 0, window)
+        slack = np.where(AA > 0, np.sqrt(AA) * window ** 2, 0)
+        near = np.nonzero((window >= -1e-9) & (np.sqrt(np.maximum(CC + (2 * BC + BB * closest) * closest, 0)) - slack <= D + 1e-6))[0]
+
+        c4, c3, c2, c1, c0 = AA[near], 2 * AB[near], BB[near] + 2 * AC[near], 2 * BC[near], CC[near] - D[near] ** 2
+        window = window[near]
+        found = np.full(len(near), np.inf)
+
+        quartic = c4 > 1e-9
+        if quartic.any():
+            q = np.nonzero(quartic)[0]
+            k4, k3, k2, k1, k0 = (c[q, None] for c in (c4, c3, c2, c1, c0))
+            companion = np.zeros((len(q), 4, 4))
+            companion[:, 0, :] = -np.concatenate([k3, k2, k1, k0], axis=1) / k4
+            companion[:, [1, 2, 3], [0, 1, 2]] = 1
+            roots = np.linalg.eigvals(companion)
+            real = np.abs(roots.imag) <= 1e-6 * (1 + np.abs(roots.real))
+            roots = roots.real
+            f = (((k4 * roots + k3) * roots + k2) * roots + k1) * roots + k0
+            df = ((4 * k4 * roots + 3 * k3) * roots + 2 * k2) * roots + k1
+            roots = np.where(df != 0, roots - f / np.where(df != 0, df, 1), roots)
+            df = ((4 * k4 * roots + 3 * k3) * roots + 2 * k2) * roots + k1
+            valid = real & (roots >= -1e-9) & (roots <= window[q, None]) & (df < 0)
+            found[q] = np.where(valid, np.maximum(roots, 0), np.inf).min(axis=1)
+
+        quadratic = ~quartic & (c2 > 0)
+        if quadratic.any():
+            q = np.nonzero(quadratic)[0]
+            disc = c1[q] ** 2 - 4 * c2[q] * c0[q]
+            root = (-c1[q] - np.sqrt(np.maximum(disc, 0))) / (2 * c2[q])
+            valid = (disc >= 0) & (root >= -1e-9) & (root <= window[q]) & (c1[q] + 2 * c2[q] * root < 0)
+            found[q] = np.where(valid, np.maximum(root, 0), np.inf)
+
+        found[(c0 < 0) & (c1 < 0)] = 0 # already overlapping and getting closer: collide right away
+        t[near] = found
+        return t
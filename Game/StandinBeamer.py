@@ -0,0 +1,130 @@
+import sys
+import json
+import threading
+import numpy as np
+import cv2
+from flask import Flask, request, jsonify, Response
+
+from .SceneTransport import SceneRenderer
+from .TileTransport import TileReceiver
+from . import BeamerStream
+
+class StandinBeamer:
+    """ Local stand-in for the beamer module, for testing the transports (JPEG frames, scenes, tile deltas) without the hardware.
+
+    Accepts frames on the same endpoints as the beamer module, as well as the persistent stream (see BeamerStream), and keeps the last frame it received. Sound cues only get counted. Point the "beamer" entry of the Game config to it and look at the result on `/v1/current`.
+
+    .. code:: bash
+
+        python -m Game.StandinBeamer 5001
+
+    Args:
+        scenes (bool, optional): accept scenes on /v1/receivescene (see SceneTransport), otherwise answer 404 like a beamer without support. Defaults to True.
+        tiles (bool, optional): accept tile deltas on /v1/receivetiles (see TileTransport). Defaults to True.
+    """
+
+    def __init__(self, scenes=True, tiles=True):
+        self.lock = threading.Lock()
+        self.frame = np.zeros((1115, 2230, 3), dtype=np.uint8) # currently shown BGR frame
+        self.scenes = SceneRenderer() if scenes else None
+        self.tiles = TileReceiver() if tiles else None
+        self.stats = {"image": 0, "scene": 0, "tiles": 0, "sound": 0, "bytes": 0, "rejected": 0, "streams": 0}
+        self.sounds = [] # sound cues received, in order
+        self.barrier = 0 # id of the last barrier reached in the stream, see BeamerStream.barrier
+        self.barrier_reached = threading.Condition(self.lock)
+
+        self.app = Flask(__name__)
+        self.app.add_url_rule("/v1/receiveimage", view_func=self.receive_image, methods=["POST"])
+        self.app.add_url_rule("/v1/receivescene", view_func=self.receive_scene, methods=["POST"])
+        self.app.add_url_rule("/v1/receivetiles", view_func=self.receive_tiles, methods=["POST"])
+        self.app.add_url_rule("/v1/stream", view_func=self.receive_stream, methods=["POST"])
+        self.app.add_url_rule("/v1/current", view_func=self.current, methods=["GET"])
+        self.app.add_url_rule("/v1/stats", view_func=self.get_stats, methods=["GET"])
+
+    def count(self, kind, status=200, size=None):
+        self.stats[kind] += 1
+        self.stats["bytes"] += (request.content_length or 0) if size is None else size
+        if status != 200:
+            self.stats["rejected"] += 1
+
+    def receive_image(self):
+        """ JPEG frame. With the header `X-Beamer-Barrier`, it gets applied only after the stream reached that barrier (at most 1 s later). The header `X-Beamer-Ack: shown` gets echoed, the frame is shown as soon as it is applied. """
+        frame = cv2.imdecode(np.frombuffer(request.get_data(), dtype=np.uint8), cv2.IMREAD_COLOR)
+        with self.lock:
+            if "X-Beamer-Barrier" in request.headers:
+                barrier = int(request.headers["X-Beamer-Barrier"])
+                self.barrier_reached.wait_for(lambda: self.barrier >= barrier, timeout=1)
+            self.frame = frame
+            self.count("image")
+        if request.headers.get("X-Beamer-Ack") == "shown":
+            return "Image received", 200, {"X-Beamer-Ack": "shown"}
+        return "Image received"
+
+    def receive_scene(self):
+        """ Scene definition, see SceneTransport """
+        if self.scenes is None:
+            return "", 404
+        with self.lock:
+            res, status = self.scenes.receive(request.json)
+            if status == 200:
+                self.frame = self.scenes.gameimage.getImageCV2()
+            self.count("scene", status)
+        return jsonify(res), status
+
+    def receive_tiles(self):
+        """ Tile keyframe or delta, see TileTransport """
+        if self.tiles is None:
+            return "", 404
+        with self.lock:
+            res, status = self.tiles.receive(request.get_data())
+            if status == 200:
+                self.frame = self.tiles.frame
+            self.count("tiles", status)
+        return jsonify(res), status
+
+    def receive_stream(self):
+        """ Persistent stream of frames, scenes, tiles, sound cues and barriers (see BeamerStream). A message that can not be applied (like a delta on the wrong base) ends the stream, the sender then falls back to single requests and opens a new stream. """
+        with self.lock:
+            self.stats["streams"] += 1
+        for kind, payload in BeamerStream.read_messages(request.stream):
+            with self.lock:
+                status = 200
+                if kind == "frame":
+                    self.frame = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+                elif kind == "scene" and self.scenes is not None:
+                    _, status = self.scenes.receive(json.loads(payload))
+                    if status == 200:
+                        self.frame = self.scenes.gameimage.getImageCV2()
+                elif kind == "tiles" and self.tiles is not None:
+                    _, status = self.tiles.receive(payload)
+                    if status == 200:
+                        self.frame = self.tiles.frame
+                elif kind == "sound":
+                    self.sounds.append(json.loads(payload)["sound"])
+                elif kind == "barrier":
+                    self.barrier = json.loads(payload)["id"]
+                    self.barrier_reached.notify_all()
+                elif kind != "hello":
+                    status = 400 # unknown kind, or scenes/tiles are disabled
+                if kind in ["frame", "scene", "tiles", "sound"]:
+                    self.count("image" if kind == "frame" else kind, status, len(payload))
+                elif status != 200:
+                    self.stats["rejected"] += 1
+            if status != 200:
+                return jsonify({"error": f"can not apply {kind} message"}), status
+        return "Stream ended"
+
+    def current(self):
+        """ The currently shown frame as PNG """
+        with self.lock:
+            _, buffer = cv2.imencode(".png", self.frame)
+        return Response(buffer.tobytes(), mimetype="image/png")
+
+    def get_stats(self):
+        """ Number of frames received per transport, bytes received and rejected payloads """
+        with self.lock:
+            return jsonify(self.stats)
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 5001
+    StandinBeamer().app.run(host="0.0.0.0", port=port, threaded=True)
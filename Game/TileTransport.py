@@ -0,0 +1,157 @@
+import json
+import struct
+import numpy as np
+import cv2
+
+""" This file supplies the tile delta transport: instead of a full JPEG per frame, only the tiles that changed since the last frame the beamer acknowledged get sent.
+
+The frame gets split into square tiles. Changed tiles get packed into one mosaic image, which gets JPEG encoded once. A payload is
+
+.. code:: python3
+
+    payload = struct.pack(">I", len(header)) + header + jpeg
+    header = json.dumps({
+        "version": 1, # TileTransport.VERSION
+        "key": "3f2a...", # content key of the frame (see Game.beamer_send_frame)
+        "base": "91bc..." or None, # key of the frame the receiver must currently hold, None for a keyframe
+        "size": [2230, 1115], # width, height of the frame
+        "tile": 64, # edge length of a tile in px
+        "tiles": [[3, 0], [4, 0]] # column, row of each changed tile, in mosaic order (row by row, TileEncoder.columns(len(tiles)) per row)
+    }).encode()
+
+A keyframe has "base": None and carries the whole frame as single JPEG. The receiver (TileReceiver) answers 409 if it does not hold the base, the sender then sends a keyframe. Keyframes also get sent periodically and whenever most of the frame changed.
+"""
+
+VERSION = 1
+
+def pack(header, jpeg):
+    """ Build a payload from the header dict and the JPEG bytes """
+    header = json.dumps(header).encode()
+    return struct.pack(">I", len(header)) + header + jpeg
+
+def unpack(payload):
+    """ Split a payload into the header dict and the JPEG bytes """
+    n, = struct.unpack(">I", payload[:4])
+    return json.loads(payload[4:4+n]), payload[4+n:]
+
+def columns(n):
+    """ Number of tiles per row of the mosaic for n tiles, keeps the mosaic roughly square """
+    return max(int(np.ceil(np.sqrt(n))), 1)
+
+class TileEncoder:
+    """ Sending side of the tile delta transport.
+
+    The encoder keeps the last frame the receiver acknowledged (TileEncoder.ack) and diffs new frames against it tile by tile. The diff is exact (on the source frames, not the decoded JPEGs), a changed tile always gets sent in full, so JPEG errors never accumulate.
+
+    Args:
+        tile (int, optional): edge length of a tile in px, a multiple of 16 keeps the JPEG blocks aligned to the tiles. Defaults to 64.
+        keyframe_interval (int, optional): send a keyframe at least after this many deltas. Defaults to 30.
+        keyframe_ratio (float, optional): send a keyframe if more than this share of the tiles changed. Defaults to 0.5.
+        quality (int, optional): JPEG quality. Defaults to 90.
+    """
+
+    def __init__(self, tile=64, keyframe_interval=30, keyframe_ratio=0.5, quality=90):
+        self.tile = tile
+        self.keyframe_interval = keyframe_interval
+        self.keyframe_ratio = keyframe_ratio
+        self.quality = quality
+        self.reset()
+
+    def reset(self):
+        """ Forget the acknowledged frame, the next frame becomes a keyframe """
+        self.base = None # (key, frame) acknowledged by the receiver
+        self.deltas = 0 # deltas sent since the last keyframe
+        self.pending = None # (key, frame, keyframe) sent but not acknowledged yet
+
+    def grid(self, frame):
+        """ Frame padded to full tiles, as array of shape (rows, columns, tile, tile, 3) """
+        t = self.tile
+        h, w = frame.shape[:2]
+        padded = np.zeros((-(-h // t) * t, -(-w // t) * t, 3), dtype=np.uint8)
+        padded[:h, :w] = frame
+        return padded.reshape(padded.shape[0] // t, t, padded.shape[1] // t, t, 3).swapaxes(1, 2)
+
+    def encode(self, frame, key):
+        """ Encode a frame as keyframe or delta against the acknowledged frame.
+
+        Args:
+            frame (np.ndarray): BGR frame, gets kept as reference (not copied), so it must not change afterwards
+            key (str): content key of the frame
+
+        Returns:
+            bytes: payload
+        """
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        header = {"version": VERSION, "key": key, "base": None, "size": [frame.shape[1], frame.shape[0]], "tile": self.tile, "tiles": []}
+
+        changed = None
+        if self.base is not None and self.base[1].shape == frame.shape and self.deltas < self.keyframe_interval:
+            new, old = self.grid(frame), self.grid(self.base[1])
+            mask = (new != old).any(axis=(2, 3, 4))
+            if mask.mean() <= self.keyframe_ratio:
+                changed = np.argwhere(mask) # (row, column) in row major order
+
+        if changed is None: # keyframe
+            self.pending = (key, frame, True)
+            return pack(header, cv2.imencode(".jpg", frame, params)[1].tobytes())
+
+        header["base"] = self.base[0]
+        header["tiles"] = [[int(c), int(r)] for r, c in changed]
+        self.pending = (key, frame, False)
+        if len(changed) == 0:
+            return pack(header, b"")
+        t, cols = self.tile, columns(len(changed))
+        rows = -(-len(changed) // cols)
+        mosaic = np.zeros((rows * t, cols * t, 3), dtype=np.uint8)
+        for i, (r, c) in enumerate(changed):
+            mosaic[(i // cols) * t:(i // cols + 1) * t, (i % cols) * t:(i % cols + 1) * t] = new[r, c]
+        return pack(header, cv2.imencode(".jpg", mosaic, params)[1].tobytes())
+
+    def ack(self):
+        """ The receiver acknowledged the last encoded payload, it becomes the base of the next delta """
+        if self.pending is None:
+            return
+        key, frame, keyframe = self.pending
+        self.base = (key, frame)
+        self.deltas = 0 if keyframe else self.deltas + 1
+        self.pending = None
+
+class TileReceiver:
+    """ Receiving side of the tile delta transport, keeps the current frame and applies payloads to it. Meant to run on the beamer module (see StandinBeamer for a local stand-in).
+    """
+
+    def __init__(self):
+        self.key = None # content key of the current frame
+        self.frame = None # current BGR frame
+
+    def receive(self, payload):
+        """ Apply a payload (keyframe or delta) to the current frame.
+
+        Args:
+            payload (bytes): payload built by TileEncoder.encode
+
+        Returns:
+            dict, int: response and http status code. 200 if applied, 409 if the base of a delta is not the current frame, 400 for an unsupported version.
+        """
+        header, jpeg = unpack(payload)
+        if header.get("version") != VERSION:
+            return {"error": f"unsupported tile version {header.get('version')}"}, 400
+        w, h = header["size"]
+        if header["base"] is None:
+            self.frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+            self.key = header["key"]
+            return {"key": self.key}, 200
+        if header["base"] != self.key or self.frame is None or self.frame.shape[:2] != (h, w):
+            return {"error": "tile base does not match", "key": self.key}, 409
+
+        tiles = header["tiles"]
+        if len(tiles) != 0:
+            t, cols = header["tile"], columns(len(tiles))
+            mosaic = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+            for i, (c, r) in enumerate(tiles):
+                x, y = c * t, r * t
+                tw, th = min(t, w - x), min(t, h - y) # tiles on the edge are padded
+                my, mx = (i // cols) * t, (i % cols) * t
+                self.frame[y:y+th, x:x+tw] = mosaic[my:my+th, mx:mx+tw]
+        self.key = header["key"]
+        return {"key": self.key}, 200
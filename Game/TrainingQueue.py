@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from collections import deque
+
+class TrainingQueue:
+    """ Collects training data for the camera AI, saving the labels in the background, so requests during gameplay do not wait for the camera module.
+
+    The camera keeps a single cached image (Camera.cache_image) and saves it with the labels it gets next (Camera.save_cached_image_training). Caching has to capture the table at the moment of the call, so TrainingQueue.cache_image calls the camera right away and never defers or retries it. Only the labels get queued. Several labels for the same cached image get batched, only the latest (the newest correction) gets sent.
+
+    Failed saves get retried with a growing delay. If the camera stays unreachable, or a new image got cached before the labels of the previous one were delivered, the labels get appended to a JSON lines file on disk (with the time they were given), so the training data is not lost. They are not replayed automatically, as the image they belong to only exists in the cache of the camera.
+
+    Args:
+        camera (Camera): remote camera module
+        backlog (str): path of the JSON lines file for labels that could not be delivered
+        size (int, optional): maximum number of queued labels, the oldest get dropped (they go to the backlog). Defaults to 64.
+        retries (int, optional): attempts per save after the first one. Defaults to 3.
+        backoff (float, optional): seconds to wait before the first retry, doubles with every retry. Defaults to 1.
+    """
+
+    def __init__(self, camera, backlog, size=64, retries=3, backoff=1):
+        self.camera = camera
+        self.backlog = backlog
+        self.size = size
+        self.retries = retries
+        self.backoff = backoff
+        self.jobs = deque() # (coordinates, time, image) of the labels to save
+        self.image = 0 # number of the image the camera currently caches, labels only get saved with the image that was cached when they were given
+        self.busy = False
+        self.condition = threading.Condition() # reentrant, also guards self.stats
+        self.camera_lock = threading.Lock() # held during each call to the camera, so a save can not land after a new image got cached
+        self.stats = {"queued": 0, "batched": 0, "done": 0, "retried": 0, "failed": 0, "stale": 0, "dropped": 0, "persisted": 0}
+        self.thread = threading.Thread(target=self.run, name="training-queue", daemon=True)
+        self.thread.start()
+
+    def cache_image(self):
+        """ Call Camera.cache_image right away: the camera keeps its current image for the next labels. Waits for a save that is being delivered at the moment, labels still queued for the previous image go to the backlog once the worker gets to them. Errors get raised, not retried. """
+        with self.camera_lock:
+            with self.condition:
+                self.image += 1
+            self.camera.cache_image()
+
+    def save_labels(self, coordinates):
+        """ Queue Camera.save_cached_image_training: the camera saves its cached image with these labels
+
+        Args:
+            coordinates (dict): ball coordinates, the labels
+        """
+        with self.condition:
+            job = (coordinates, time.time(), self.image)
+            self.stats["queued"] += 1
+            if len(self.jobs) != 0 and self.jobs[-1][2] == job[2]:
+                self.jobs[-1] = job # batch with the waiting labels of the same image, the latest wins
+                self.stats["batched"] += 1
+            else:
+                if len(self.jobs) >= self.size:
+                    self.stats["dropped"] += 1
+                    self.persist(self.jobs.popleft())
+                self.jobs.append(job)
+            self.condition.notify_all()
+
+    def run(self):
+        """ Loop of the worker thread: deliver the labels in order """
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: len(self.jobs) != 0)
+                job = self.jobs.popleft()
+                self.busy = True
+            try:
+                self.deliver(job)
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+
+    def deliver(self, job):
+        """ Save the labels of a job with the cached image, retry on failure and persist labels that could not be delivered """
+        coordinates, _, image = job
+        for attempt in range(self.retries + 1):
+            if attempt != 0:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+                self.count("retried")
+            with self.camera_lock:
+                if image != self.image: # the camera cached a new image meanwhile, the labels would end up with the wrong one
+                    print("Training data: a new image got cached before the labels were saved, keeping them in the backlog")
+                    self.count("stale")
+                    self.persist(job)
+                    return
+                try:
+                    self.camera.save_cached_image_training(coordinates)
+                    self.count("done")
+                    return
+                except Exception as e:
+                    print(f"Training data: saving labels failed (attempt {attempt + 1}): {e}")
+        self.count("failed")
+        self.persist(job)
+
+    def persist(self, job):
+        """ Append the labels of a job to the backlog file """
+        coordinates, given, _ = job
+        try:
+            with open(self.backlog, "a") as f:
+                f.write(json.dumps({"time": given, "coordinates": coordinates}) + "\n")
+            self.count("persisted")
+        except OSError as e:
+            print(f"Training data: could not write labels to {self.backlog}: {e}")
+
+    def count(self, key):
+        """ Increment a counter in self.stats, under the lock, as the stats get read from other threads """
+        with self.condition:
+            self.stats[key] += 1
+
+    def report(self):
+        """ Counters of the queue so far (queued, batched, done, retried, failed, stale, dropped, persisted)
+
+        Returns:
+            dict: copy of self.stats
+        """
+        with self.condition:
+            return dict(self.stats)
+
+    def flush(self, timeout=None):
+        """ Block until all queued labels are delivered (or persisted)
+
+        Returns:
+            bool: False if the timeout expired
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: len(self.jobs) == 0 and not self.busy, timeout=timeout)
@@ -3,12 +3,16 @@ from .billard_base_module.RemoteModules import Camera, Beamer
 
 # imports for sphinx to find
 from . import GameImage#, GameEngine, GameRules, Player, billard_base_module
+from .FrameSender import FrameSender
+from .gamemodes import http_utils
+from . import TileTransport
+from .BeamerStream import BeamerStream
+from .TrainingQueue import TrainingQueue
 
 
 
 #from .GameImage import GameImage, BilliardBall
 #from .Elo import Elo
-import numpy as np
 import pandas as pd
 import os
 from pathlib import Path
@@ -18,7 +22,6 @@ import socket
 import requests
 import json
 import cv2
-import time
 import logging
 import dotenv
 import re
@@ -83,11 +86,28 @@ class Game(Module):
 
 		Module.__init__(self, config=f"{current_dir}/{config}", test_config=os.path.join(current_dir, test_config), template_folder=f"{current_dir}/{template_folder}", storage_folder=self.download_dir, static_folder=f"{current_dir}/static")
 
+		http_utils.configure(self.config.get("http", {}))
 		self.camera = Camera(self.getModuleConfig("camera"))
 		self.beamer = Beamer(self.getModuleConfig("beamer"))
-
+		self.training = TrainingQueue(self.camera, os.path.join(self.storage, "training_backlog.jsonl")) # training data for the camera AI, saved in the background
+
+		GameImage.GameImage.projection = GameImage.Projection.from_config(self.config)
+		GameImage.render_profile.enabled = self.config.get("render-profiling", False)
+		self.beamer_shown = None # content key of the frame the beamer acknowledged last, see beamer_send_frame
+		self.beamer_transport = self.config.get("beamer-output", {}).get("transport", "jpeg") # "jpeg" or "scene", see beamer_send_scene
+		self.beamer_scene = None # state of the scene the beamer acknowledged last, see SceneTransport.scene_message
+		tiles = self.config.get("beamer-output", {}).get("tiles", {})
+		self.tile_encoder = TileTransport.TileEncoder(tile=tiles.get("size", 64), keyframe_interval=tiles.get("keyframe-interval", 30)) # see beamer_send_tiles
+		self.pipeline_timings = {} # stage timings of the last run per sequence (forward_coords), see Pipeline
+		self.beamer_display_latency = self.config.get("beamer-output", {}).get("display-latency", 0.3) # seconds to wait after blanking the beamer, see beamer_blank
+		self.beamer_confirmed_latency = self.config.get("beamer-output", {}).get("confirmed-display-latency", 0.05) # seconds the projector needs to show a frame the beamer module confirmed, see beamer_blank
+		self.beamer_stream = None # persistent stream to the beamer, see beamer_post
+		if self.config.get("beamer-output", {}).get("stream", False):
+			beamer = self.getModuleConfig("beamer")
+			self.beamer_stream = BeamerStream(beamer["ip"], int(beamer["port"]), on_open=self.beamer_stream_reset, on_close=self.beamer_stream_reset, timeout=http_utils.connect_timeout)
+		self.frame_sender = FrameSender(self.beamer_send_frame)
 		self.gameimage = GameImage.GameImage(definition=self.base_image.copy())
-		self.beamer.push_image(self.gameimage.getImageCV2())
+		self.beamer_push_image(self.gameimage)
 
 		with open(f"{self.storage}/players.json") as f:
 			self.players = json.load(f)
@@ -103,6 +123,7 @@ class Game(Module):
 			"local_game": local_game.LocalGame(api_secrets),
 			"curling": Curling()
 		}
+		self.beamer_build_static_frames()
 
 
 		socket_dict = {
@@ -117,7 +138,10 @@ class Game(Module):
 				"correctedcoords": self.beamer_correct_coords,
 				"beameroff": self.beamer_off,
 				"takeimage": self.take_image,
-				"settext": self.beamer_update_manual_text
+				"settext": self.beamer_update_manual_text,
+				"renderprofile": self.get_render_profile,
+				"beamerpush": self.beamer_push_stats,
+				"timings": self.get_pipeline_timings
 			},
 			"camera": {
 				"coords": self.forward_coords
@@ -159,13 +183,31 @@ class Game(Module):
 			- change endpoint to template like `/ballimage/<number>` instead of current system with args.
 		"""
 		n = int(request.args.get("n"))
-		ball = GameImage.BilliardBall(n)
-		img = np.array(ball.getImg(60))[:,:,[2,1,0]] # 60x60 pixels, transformed to a cv2 object type
+		sprite = GameImage.BilliardBall.getSprite(n, 60) # 60x60 pixels
+		img = GameImage.export_bgr(sprite, GameImage.bgr_buffers.take((sprite.height, sprite.width, 3))) # transformed to a cv2 object type, only needed until it is encoded
 
 		#print(n)
 		_, buffer = cv2.imencode(".png", img)
+		GameImage.bgr_buffers.give(img)
 		return Response(buffer.tobytes(), mimetype="image/png")
 
+	def get_render_profile(self):
+		"""Get the render profile of GameImage as JSON: wall time and memory per part type and per ref, see GameImage.RenderProfile.stats.
+
+		Send `reset=1` as request argument (`/renderprofile?reset=1`) to start a new recording after the response. Send `enable=1` or `enable=0` to switch profiling on or off at runtime, it is off unless `render-profiling` is set in the config.
+		"""
+		profile = GameImage.render_profile
+		if "enable" in request.args:
+			profile.enabled = request.args.get("enable") == "1"
+		stats = profile.stats()
+		if request.args.get("reset") == "1":
+			profile.reset()
+		return jsonify(stats)
+
+	def get_pipeline_timings(self):
+		""" Get the stage timings (in ms) of the last forward_coords run as JSON, see Pipeline.wait """
+		return jsonify(self.pipeline_timings)
+
 	def view_csv(self, file):
 		""" Renders a single csv file as a html table and shows it. CSV files must not have an index and must be separated by tabs (\t). If the file does not exist or does not end in `.csv`, returns status 404 or 403 """
 		fileStorage = os.path.join(self.storage_dir, file)
@@ -200,21 +242,19 @@ class Game(Module):
 		return html
 
 	def take_image(self):
-		""" Turn of the beamer and take an image.
+		""" Turn of the beamer and take an image as soon as the beamer confirmed the black screen (see camera_capture).
 		"""
-		self.beamer.off()
-		time.sleep(0.1)
-		res = self.camera.save_image()
+		res = self.camera_capture(self.camera.save_image)
 		print(res)
-		self.beamer.push_image(self.gameimage.getImageCV2())
+		self.beamer_push_image(self.gameimage)
 		
 		return res
 
 	# INTERACTIONS WITH CAMERA MODULE ###############################################
-	from ._camera_interface import forward_coords, camera_save_image
+	from ._camera_interface import forward_coords, camera_capture, camera_save_image
 
 	# INTERACTIONS WITH BEAMER MODULE ###############################################
-	from ._beamer_interface import beamer_push_image, beamer_off, beamer_make_gameimage, beamer_correct_coords, beamer_update_manual_text
+	from ._beamer_interface import beamer_push_image, beamer_send_frame, beamer_send_scene, beamer_send_tiles, beamer_post, beamer_play_sound, beamer_stream_reset, beamer_blank, beamer_push_stats, beamer_build_static_frames, beamer_off, beamer_make_gameimage, beamer_correct_coords, beamer_update_manual_text
 
 	# GAMEMODE CONTROLLER ###########################################################
 	from ._gamemode_controller import gamemode_controller, get_gamemode_website, list_available_gamemodes, gamemode_socket_handler, get_gamemode_report
@@ -1,38 +1,247 @@
-import requests
+from .gamemodes import http_utils
 import cv2
+import hashlib
+import json
+import time
 from .GameImage import GameImage
+from . import SceneTransport
 import numpy as np
-from flask import request
+from flask import request, jsonify
 
 # These methods mostly get called by internal functions to display the gameimage 
 
-def beamer_push_image(self, img):
+def beamer_push_image(self, img, wait=False, force=False):
     """ Method to post an image to the beamer module to be displayed on the beamer.
 
+    The image gets queued at the frame sender (see FrameSender) and this returns immediately, encoding and posting happens in the background (see beamer_send_frame). If a newer image gets pushed before this one was sent, this one gets dropped.
+
+    A GameImage gets snapshotted with GameImage.copy, which does not render anything, so changing self.gameimage afterwards does not change the queued frame.
+
     :param img: image to be posted. Will get stretched to fullscreen on the beamer.
-    :type img: cv2-image
+    :type img: GameImage, cv2-image or bytes (already JPEG encoded)
+    :param wait: block until the image has been posted, defaults to False
+    :type wait: bool, optional
+    :param force: post even if the beamer already shows the same frame (see beamer_send_frame), defaults to False
+    :type force: bool, optional
     """
+    if force:
+        self.beamer_shown = None
+    if isinstance(img, GameImage):
+        img = img.copy()
+    self.frame_sender.push(img)
+    if wait:
+        self.frame_sender.flush()
+    return "Game beamer push image"
+
+def beamer_send_frame(self, img):
+    """ Encode and post a single frame to the beamer module. Gets called from the frame sender thread, use beamer_push_image instead.
+
+    A GameImage gets posted using its cached JPEG (GameImage.getImageJPEG), so screens that have been shown recently are neither drawn nor encoded again. With the transport "scene" (self.beamer_transport), only the definition gets sent and the beamer renders it itself, see beamer_send_scene. With the transport "tiles", only the tiles that changed get sent, see beamer_send_tiles.
+
+    Frames get deduplicated by content: if the beamer acknowledged the same frame last time (self.beamer_shown), nothing gets encoded or posted. The content key of a GameImage is its GameImage.scene_key, images and bytes get hashed. With streaming, the stream gets checked first (BeamerStream.poll): if the beamer rejected a message, what it acknowledged is unknown (see beamer_stream_reset) and the frame gets sent again.
+
+    :param img: image to be posted
+    :type img: GameImage, cv2-image or bytes (already JPEG encoded)
+    :return: False if the frame was skipped as duplicate, True if it was posted
+    :rtype: bool
+    """
+    if isinstance(img, GameImage):
+        key = img.scene_key()
+    else:
+        key = hashlib.sha1(img if type(img) is bytes else np.ascontiguousarray(img)).hexdigest()
+    if self.beamer_stream is not None:
+        self.beamer_stream.poll()
+    if key == self.beamer_shown:
+        return False
+
+    if isinstance(img, GameImage) and self.beamer_transport == "scene" and self.beamer_send_scene(img, key):
+        return True
+    if isinstance(img, GameImage) and self.beamer_transport == "tiles" and self.beamer_send_tiles(img, key):
+        return True
+
+    if isinstance(img, GameImage):
+        data = img.getImageJPEG()
+    elif type(img) is bytes:
+        data = img
+    else:
+        _, buffer = cv2.imencode(".jpg", img)
+        data = buffer.tobytes()
+    self.beamer_shown = None # unknown until the beamer acknowledges
+    if self.beamer_post("frame", data, "image/jpeg") < 300:
+        self.beamer_shown = key
+
+    print("Posted image to the beamer-module.")
+    return True
+
+def beamer_send_scene(self, img, key):
+    """ Post the definition of a GameImage to the beamer module instead of a JPEG frame (see SceneTransport). Only the parts that changed since the last scene the beamer acknowledged get sent (self.beamer_scene).
+
+    If the beamer does not hold the base of the delta, the complete scene gets sent. If the beamer does not support scenes at all (404/405), the transport switches to "jpeg" for good.
+
+    :param img: image to be posted
+    :type img: GameImage
+    :param key: GameImage.scene_key of the image
+    :type key: str
+    :return: True if the beamer accepted the scene, False if the frame has to be sent as JPEG
+    :rtype: bool
+    """
+    message, scene = SceneTransport.scene_message(img, base=self.beamer_scene)
+    if message is None: # a part can not be serialized, e.g. a PIL image
+        return False
+    self.beamer_shown = None # unknown until the beamer acknowledges
+    status = self.beamer_post("scene", json.dumps(message).encode(), "application/json")
+    if status == 409 and message["base"] is not None: # the beamer lost the base, send everything
+        message, scene = SceneTransport.scene_message(img)
+        status = self.beamer_post("scene", json.dumps(message).encode(), "application/json")
+    if status in [404, 405]:
+        print("The beamer-module does not support scenes, falling back to JPEG frames.")
+        self.beamer_transport = "jpeg"
+        return False
+    if status >= 300:
+        self.beamer_scene = None
+        return False
+
+    self.beamer_scene = scene
+    self.beamer_shown = key
+    print("Posted scene to the beamer-module.")
+    return True
+
+def beamer_send_tiles(self, img, key):
+    """ Post only the tiles of the frame that changed since the frame the beamer acknowledged last (see TileTransport). Periodic keyframes get sent by the encoder (self.tile_encoder).
+
+    If the beamer does not hold the base of the delta, a keyframe gets sent. If the beamer does not support tiles at all (404/405), the transport switches to "jpeg" for good.
+
+    :param img: image to be posted
+    :type img: GameImage
+    :param key: GameImage.scene_key of the image
+    :type key: str
+    :return: True if the beamer accepted the tiles, False if the frame has to be sent as JPEG
+    :rtype: bool
+    """
+    frame = img.getImageCV2() # read-only and cached with the frame, so it can be kept as base of the next delta
+    self.beamer_shown = None # unknown until the beamer acknowledges
+    status = self.beamer_post("tiles", self.tile_encoder.encode(frame, key), "application/octet-stream")
+    if status == 409: # the beamer lost the base, send a keyframe
+        self.tile_encoder.reset()
+        status = self.beamer_post("tiles", self.tile_encoder.encode(frame, key), "application/octet-stream")
+    if status in [404, 405]:
+        print("The beamer-module does not support tiles, falling back to JPEG frames.")
+        self.beamer_transport = "jpeg"
+        return False
+    if status >= 300:
+        self.tile_encoder.reset()
+        return False
+
+    self.tile_encoder.ack()
+    self.beamer_shown = key
+    print("Posted tiles to the beamer-module.")
+    return True
+
+def beamer_post(self, kind, data, content_type, ack=False):
+    """ Send a frame, scene or tile payload to the beamer module. If streaming is enabled (self.beamer_stream), it gets written into the persistent stream (see BeamerStream), otherwise or if the stream is not available it gets posted as single request to the matching endpoint.
+
+    With `ack`, it always gets posted as single request with the header `X-Beamer-Ack: shown`, asking the beamer to answer only once the frame is shown. A beamer that does so confirms it by echoing the header, without it the answer only means the frame was received. If the stream is open, a barrier message gets written into it first and the request carries its id (`X-Beamer-Barrier`, see BeamerStream.barrier): the beamer applies the request only after everything streamed before, so no streamed frame can show up after this one. The stream stays open.
+
+    :param kind: "frame" (JPEG, /v1/receiveimage), "scene" (/v1/receivescene) or "tiles" (/v1/receivetiles)
+    :type kind: str
+    :param data: payload
+    :type data: bytes
+    :param content_type: content type of the single request
+    :type content_type: str
+    :param ack: wait until the beamer confirmed the frame is shown, defaults to False
+    :type ack: bool, optional
+    :return: http status code, 200 if it was written into the stream. With `ack`, 202 if the beamer received the frame but did not confirm that it is shown.
+    :rtype: int
+    """
+    headers = {"content-type": content_type}
+    if ack:
+        headers["X-Beamer-Ack"] = "shown"
+        barrier = self.beamer_stream.barrier() if self.beamer_stream is not None else None
+        if barrier is not None:
+            headers["X-Beamer-Barrier"] = str(barrier)
+    elif self.beamer_stream is not None and self.beamer_stream.send(kind, data):
+        return 200
+    endpoints = {"frame": "/v1/receiveimage", "scene": "/v1/receivescene", "tiles": "/v1/receivetiles"}
     # build the url to post the image to
     beamer = self.getModuleConfig("beamer")
-    #print(beamer)
-    url = f"http://{beamer['ip']}:{beamer['port']}" + "/v1/receiveimage"
+    url = f"http://{beamer['ip']}:{beamer['port']}" + endpoints[kind]
     #url = "http://134.28.20.50:5000/v1/receiveimage"
     #url = "http://127.0.0.1:5000/v1/receiveimage"
+    response = http_utils.post(url, data=data, headers=headers)
+    if ack and response.status_code < 300 and response.headers.get("X-Beamer-Ack") != "shown":
+        return 202
+    return response.status_code
+
+def beamer_play_sound(self, sound):
+    """ Play a sound on the beamer. Gets multiplexed into the stream with the frames if streaming is enabled (see BeamerStream), so it keeps its order relative to the frames, otherwise uses Beamer.play_sound.
+
+    :param sound: name of the sound
+    :type sound: str
+    """
+    if self.beamer_stream is not None and self.beamer_stream.send("sound", json.dumps({"sound": sound}).encode()):
+        return
+    self.beamer.play_sound(sound)
+
+def beamer_stream_reset(self):
+    """ A new stream got opened (see BeamerStream.on_open), the beamer starts without a base for deltas. Also called as soon as the stream broke or the beamer rejected a message (see BeamerStream.on_close): messages written since then got lost, so the beamer may not show the frame it last acknowledged. """
+    self.beamer_shown = None
+    self.beamer_scene = None
+    self.tile_encoder.reset()
+
+def beamer_push_stats(self):
+    """ Counters and latencies of the frame sender (pushed, sent, skipped duplicates, dropped, errors, skip rate, last/mean/max push latency in ms) and of the stream (if enabled) as JSON """
+    stats = self.frame_sender.report()
+    if self.beamer_stream is not None:
+        stats["stream"] = dict(self.beamer_stream.stats)
+    return jsonify(stats)
+
+def beamer_build_static_frames(self):
+    """ Render and encode the static screens once at startup: black, the base logo screen (Game.base_image) and the idle screen (state "init") of every gamemode.
 
-    _, buffer = cv2.imencode(".jpg", img)
+    Only the JPEGs get kept (GameImage.pin), so showing one of these screens later on neither draws nor encodes anything. The (scene key, JPEG) pairs are kept by name in self.static_frames, so they can be sent as raw bytes, like the black frame by beamer_blank and beamer_off.
+    """
+    self.static_frames = {
+        "black": GameImage(definition=[]).pin(),
+        "base": GameImage(definition=self.base_image.copy()).pin()
+    }
+    for name, gamemode in self.GAMEMODES.items():
+        if not hasattr(gamemode, "TREE") or gamemode.TREE["init"][2] is None:
+            continue
+        try:
+            self.static_frames[name] = GameImage(definition=gamemode.TREE["init"][2]()).pin()
+        except Exception as e: # some idle screens depend on data only available once the gamemode runs
+            print(f"No static idle frame for gamemode {name}: {e}")
+
+def beamer_blank(self):
+    """ Show the black frame and return once the projector is dark. Used right before taking an image with the camera.
+
+    The frame gets posted with an acknowledgement (see beamer_post). If the beamer confirmed that the frame is shown, only the time the projector needs to actually go dark gets waited (self.beamer_confirmed_latency, from the config), otherwise the full self.beamer_display_latency. If the post fails, the error gets printed and the full time waited as well, so the camera still takes its image.
+
+    Call it while holding the frame sender (FrameSender.hold) and keep holding it until the image is taken, so no queued frame can light up the table in between:
+
+    .. code:: python3
+
+        with self.frame_sender.hold():
+            self.beamer_blank()
+            res = self.camera.get_coords()
+    """
+    key, jpeg = self.static_frames["black"]
+    self.beamer_shown = None # unknown until the beamer acknowledges
     try:
-        requests.post(url, data=buffer.tobytes(), headers={"content-type": "image/jpeg"})
+        status = self.beamer_post("frame", jpeg, "image/jpeg", ack=True)
     except Exception as e:
-        print(e)
-
-    print(f"Posted image to the beamer-module at {url}.")
-    return "Game beamer push image"
+        print(f"Cant blank the beamer-module: {e}")
+        status = 500
+    if status < 300:
+        self.beamer_shown = key
+    time.sleep(self.beamer_confirmed_latency if status == 200 else self.beamer_display_latency)
 
 def beamer_off(self):
     """ Method to send to and display a black image on the beamer from the beamer module.
+
+    Sends the pre-encoded black frame (see beamer_build_static_frames), nothing gets allocated or encoded.
     """
-    black_image = np.zeros((1080,1920,3))
-    self.beamer_push_image(black_image)
+    self.beamer_push_image(self.static_frames["black"][1], wait=True) # callers rely on the beamer being dark afterwards
 
     return "Beamer displays a black image."
 
@@ -64,15 +273,15 @@ def beamer_correct_coords(self):
     coords = request.json
     #print(coords)
 
-    # order the camera module to cache the current image. When the coords are commited, they are saved with the last cached image for training purposes.
-    self.camera.cache_image()
+    # order the camera module to cache the current image. When the coords are commited, they are saved with the last cached image for training purposes. Called right away, as the image has to show the table now, only the saves run in the background (see TrainingQueue).
+    self.training.cache_image()
 
     #if self.supermode in ["game-local", "kp2"]:
     self.game_coords = coords
 
     #print(coords)
     self.gameimage.update_definition({"type": "balls", "coords": coords})
-    self.beamer.push_image(self.gameimage.getImageCV2())
+    self.beamer_push_image(self.gameimage)
     #self.beamer_make_gameimage(coords=coords)
     return "Coords forwarded to the beamer."
 
@@ -81,5 +290,5 @@ def beamer_update_manual_text(self):
     #self.live_value = res["text"]
     #self.beamer_make_gameimage()
     self.gameimage.update_text(res["text"])
-    self.beamer.push_image(self.gameimage.getImageCV2())
+    self.beamer_push_image(self.gameimage)
     return f"Written text to beamer: '{res['text']}'"
\ No newline at end of file
@@ -4,33 +4,44 @@ import os
 from flask import Flask, jsonify, render_template, request, redirect, session
 import socket
 #import urllib.request
-import requests
+from .gamemodes import http_utils
 import json
-import time
 
 from .GameImage import GameImage
+from .Pipeline import Pipeline
 
 def forward_coords(self):
     """ Collect the coordinates from the camera module and forward it to the client
 
     This prevents the user from having to directly connect to the camera module. Also updates the beamer with the newly received coordinates and overlays them on the current GameImage object (self.gameimage).
 
-    Todo:
-        - Experiment with timings between turning off the beamer and taking the image (especially with playing a sound simultaneously on the beamer)
+    The remote calls run as Pipeline: the warning sound and the black screen get requested at the same time, the camera runs as soon as the beamer confirmed the black screen (see camera_capture), whether the sound call returned or not. The "finished" sound gets requested while the new image is drawn and queued (the frame sender sends it). The stage timings get stored in self.pipeline_timings["forward_coords"].
     """
-    self.beamer.play_sound("please_dont_touch_the_balls")
-    self.beamer_off() # project a black screen before taking the image so that the proection cant influence the Camera AI.
-    time.sleep(0.3)
-
-    res = self.camera.get_coords()
-    self.beamer.play_sound("finished")
+    p = Pipeline()
+    p.run("sound-start", self.beamer_play_sound, "please_dont_touch_the_balls")
+    p.run("capture", self.camera_capture, self.camera.get_coords) # blanks the beamer, concurrently to the warning sound
+    p.run("sound-finished", self.beamer_play_sound, "finished", after=["capture"]) # only the image has to be taken, the warning sound call may still run
+    res = p.result("capture")
 
     # generate an image and place it on the beamer
     self.gameimage.update_definition({"type": "balls", "coords": res})
-    self.beamer.push_image(self.gameimage.getImageCV2())
+    self.beamer_push_image(self.gameimage) # only queues the frame, no need for a pipeline stage
+    self.pipeline_timings["forward_coords"] = p.wait()
 
     return jsonify(res)
 
+def camera_capture(self, capture, *args):
+    """ Blank the beamer and run a camera call (like self.camera.get_coords) as soon as the beamer confirmed the black screen (see beamer_blank). Frames queued before get sent first, while the camera runs the frame sender is held, so nothing lights up the table.
+
+    :param capture: camera method to call
+    :type capture: callable
+    :return: result of the camera call
+    """
+    self.frame_sender.flush() # frames queued before are outdated anyway, send them before blanking
+    with self.frame_sender.hold(): # nothing may light up the table until the image is taken
+        self.beamer_blank() # project a black screen before taking the image so that the proection cant influence the Camera AI.
+        return capture(*args)
+
 def camera_save_image(self):
     """ Deprecated, will raise AssertionError
     
@@ -48,7 +59,7 @@ def camera_save_image(self):
     except:
         coords = {"action": "save-image-only"}
 
-    response = requests.post(api, json=coords, headers={"content-type": "application/json"})
+    response = http_utils.post(api, json=coords, headers={"content-type": "application/json"})
     res = response.json()
     return res
     #return "aaa"
\ No newline at end of file
@@ -16,14 +16,15 @@ def gamemode_controller(self):
     - preprocess: select gamemode
     - passes it to the selected gamemode object (entrance(...) method, most of the times inherited from GameMode)
     - postprocess: update gameimage, send to beamer, read signal in output (handle), return output
-    
+
+    The new image gets queued first, so the frame sender draws and sends it while the sound gets requested. Training data gets saved in the background (see TrainingQueue).
     """
     inp = request.json
     #print("Input to the game module:", inp)
 
     # If the inp contains coordinates, they are assumed to be correct. Order the camera module to save its previously cached image with the coordinates for training in the future.
     if "coordinates" in inp.keys():
-        self.camera.save_cached_image_training(inp["coordinates"])
+        self.training.save_labels(inp["coordinates"])
 
     # PREPROCESS: select gamemode
     assert "gmode" in inp.keys(), f"gamemode not found in input, keys: {inp.keys()}"
@@ -64,15 +65,14 @@ def gamemode_controller(self):
         # every other signal is also just forwarded
 
 
-    # play the sound if specified
-    if not sound is None:
-        self.beamer.play_sound(sound)
-
     # send gameimage to the Beamer
     self.gameimage = gameimage # make available to other methods like the API interface to update the text
 
-    self.gameimage.redraw()
-    self.beamer.push_image(self.gameimage.getImageCV2())
+    self.beamer_push_image(self.gameimage) # drawn and sent by the frame sender
+
+    # play the sound if specified
+    if not sound is None:
+        self.beamer_play_sound(sound)
 
     # RETURN RESPONSE
     return jsonify(out)
@@ -104,7 +104,7 @@ def get_gamemode_website(self, mode):
     # show the current gamemodes gameimage 
     self.gameimage = self.GAMEMODES[mode].show()
     self.gameimage.redraw()
-    self.beamer.push_image(self.gameimage.getImageCV2())
+    self.beamer_push_image(self.gameimage)
 
     if hasattr(self.GAMEMODES[mode], "WEBSITE_TEMPLATE"):
         file = self.GAMEMODES[mode].WEBSITE_TEMPLATE
@@ -28,7 +28,7 @@ class Game:
 
         self.gid = secrets.token_hex(32) # random 32 byte hexadecimal identifier
 
-        self.engine = GameEngine() # GameEngine object provides methods to get (direct) shot suggestions. They are only shown if the active player wants them to
+        self.engine = GameEngine() # GameEngine object provides methods to get shot suggestions (direct, bank and combination shots). They are only shown if the active player wants them to
 
     def change_player(self):
         """Based on who is the current player (player1 or player2), this switches it. The other player will now be the active player (accessible as self.active_player) and the previously active player will now be inactive (self.inactive_player).
@@ -231,7 +231,7 @@ class Game:
 
         if self.active_player["tooltips"] and not "[END]" in message: # if the now active player wants to have tooltips, get and show them
             group = self.active_player["group"] if self.active_player["left"] != 0 else "eight"
-            shots = self.engine.getShots(coordinates, group=group)
+            shots = self.engine.estimateSuccess(self.engine.searchShots(coordinates, group=group, k=3)) # only the three easiest shots, more clutter the table
             img_definition.append({"type": "possible_shots", "shots": shots})
             
             #img_definition.append({
@@ -1,4 +1,4 @@
-""" This module provides the gamemodes, the parent class of all gamemodes and common utilities for ball interactions/analyses (common_utils) and the global API (api_utils).
+""" This module provides the gamemodes, the parent class of all gamemodes and common utilities for ball interactions/analyses (common_utils), the global API (api_utils) and pooled HTTP sessions to other modules (http_utils).
 
 In the directory, the common folder individual gamemode resources is provided as `gamemodes/resources`. All files in this folder can be accessed by the Game.view_csv method/endpoint, if they end in `.csv`.
 
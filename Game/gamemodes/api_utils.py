@@ -1,5 +1,5 @@
 from dataclasses import dataclass, asdict
-import requests
+from . import http_utils
 import json
 import os
 import pandas as pd
@@ -54,7 +54,7 @@ class API:
         """
         url = f"{self.address}:{self.port}" + os.path.join("", endpoint)
         try:
-            res = requests.post(url, json=data, auth=self.AUTH.auth())
+            res = http_utils.post(url, json=data, auth=self.AUTH.auth())
         except:
             #print(e)
             print(f"Cant establish connection or refused. Tried posting to {url}")
@@ -83,7 +83,7 @@ class API:
         url = f"{self.address}:{self.port}" + os.path.join("", endpoint)
         try:
             #print("API UTILS GET", url, self.address, self.port)
-            res = requests.get(url, auth=self.AUTH.auth())
+            res = http_utils.get(url, auth=self.AUTH.auth())
         except Exception as e:
             print(e)
             print(f"Cant establish connection or refused. Tried posting to {url}")
@@ -140,7 +140,7 @@ class API:
     def check_state(self):
         url = f"{self.address}:{self.port}/api/long_poll"
         data = {"GID": self.gid, "LS": self.last_state}
-        res = requests.post(url, json=data, auth=(self.gid, self.lpt))
+        res = http_utils.post(url, json=data, auth=(self.gid, self.lpt), timeout=(http_utils.connect_timeout, None)) # long poll: the server holds the request until the state changes
         if res.status_code == 200:
             res = res.json()
             self.last_state = res["state"]
@@ -0,0 +1,59 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from urllib.parse import urlsplit
+
+""" This file supplies pooled HTTP sessions for talking to the other modules (beamer, camera) and the global API.
+
+Every peer (scheme, host and port) gets one `requests.Session` with a keep-alive connection pool, so repeated calls reuse the TCP connection instead of doing a new handshake each time. All calls get connect and read timeouts and retry failed connection attempts a bounded number of times (a request that already reached the peer is only retried for GET, as a POST may not be safe to repeat).
+
+Use `post` and `get` like `requests.post` and `requests.get`. The Game module sets the timeouts and retries from the field "http" of its config via `configure`.
+"""
+
+connect_timeout = 3.05 # seconds to establish a connection
+read_timeout = 10 # seconds to wait for the response
+retries = 2 # additional attempts on connection errors (and read errors of GETs)
+pool_size = 4 # connections kept open per peer, several request handlers and the frame sender can talk to the same peer at once
+
+sessions = {} # "scheme://host:port" -> requests.Session
+lock = threading.Lock()
+
+def configure(config):
+    """ Set the timeouts and retries from a config dict like `{"connect-timeout": 3.05, "read-timeout": 10, "retries": 2}`. Missing fields keep their value. Sessions created before get dropped, so the new settings apply everywhere. """
+    global connect_timeout, read_timeout, retries
+    connect_timeout = config.get("connect-timeout", connect_timeout)
+    read_timeout = config.get("read-timeout", read_timeout)
+    retries = config.get("retries", retries)
+    with lock:
+        for s in sessions.values():
+            s.close()
+        sessions.clear()
+
+def session(url):
+    """ Shared session for the peer of the url, created on first use """
+    parts = urlsplit(url)
+    peer = f"{parts.scheme}://{parts.netloc}"
+    with lock:
+        s = sessions.get(peer)
+        if s is None:
+            s = requests.Session()
+            retry = Retry(total=retries, connect=retries, read=retries, status=0, redirect=0, backoff_factor=0.1) # read errors only get retried for idempotent methods
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+            s.mount(f"{parts.scheme}://", adapter)
+            sessions[peer] = s
+    return s
+
+def request(method, url, timeout=None, **kwargs):
+    """ Send a request through the shared session of the peer. The timeout defaults to (connect_timeout, read_timeout), see `requests.request` for all other arguments. """
+    if timeout is None:
+        timeout = (connect_timeout, read_timeout)
+    return session(url).request(method, url, timeout=timeout, **kwargs)
+
+def post(url, **kwargs):
+    """ Like `requests.post`, through the shared session of the peer """
+    return request("POST", url, **kwargs)
+
+def get(url, **kwargs):
+    """ Like `requests.get`, through the shared session of the peer """
+    return request("GET", url, **kwargs)
@@ -60,7 +60,7 @@ class LongestBreak(GameMode):
                     }]
 
         self.gameimage = GameImage()
-        self.gameimage.draw_from_dict(self.img_definition, draw=False) # register img_definition into the GameImage object -> track and update accordingly
+        self.img_definition = self.gameimage.draw_from_dict(self.img_definition, draw=False) # register img_definition into the GameImage object -> track and update accordingly
 
         self.is_first_hit = True
         self.TREE = {
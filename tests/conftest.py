@@ -0,0 +1,9 @@
+import sys
+import types
+from pathlib import Path
+
+# The tests import the submodules of Game directly: Game/__init__.py needs the billard_base_module submodule and starts the whole module
+if "Game" not in sys.modules:
+    package = types.ModuleType("Game")
+    package.__path__ = [str(Path(__file__).resolve().parent.parent / "Game")]
+    sys.modules["Game"] = package
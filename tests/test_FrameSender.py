@@ -0,0 +1,46 @@
+import time
+
+from Game.FrameSender import FrameSender
+
+def wait_until(condition, timeout=1):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.001)
+
+def test_latest_frame_wins():
+    sent = []
+    sender = FrameSender(sent.append, name="test-frame-sender")
+    with sender.hold():
+        sender.push("first")
+        wait_until(lambda: sender.busy) # taken by the sender thread, waits for the hold
+        sender.push("second")
+        sender.push("third")
+    assert sender.flush(timeout=1)
+
+    assert sent == ["first", "third"]
+    stats = sender.report()
+    assert stats["pushed"] == 3
+    assert stats["dropped"] == 1
+
+def test_flush_waits_for_the_frame_being_sent():
+    sent = []
+    sender = FrameSender(sent.append, name="test-frame-sender")
+    with sender.hold():
+        sender.push("frame")
+        assert not sender.flush(timeout=0.05)
+    assert sender.flush(timeout=1)
+    assert sent == ["frame"]
+
+def test_skipped_and_failed_frames_get_counted():
+    def send(frame):
+        if frame == "error":
+            raise ValueError(frame)
+        return frame != "duplicate"
+    sender = FrameSender(send, name="test-frame-sender")
+    for frame in ["duplicate", "error", "frame"]:
+        sender.push(frame)
+        assert sender.flush(timeout=1)
+
+    stats = sender.report()
+    assert (stats["skipped"], stats["errors"], stats["sent"]) == (1, 1, 1)
@@ -0,0 +1,165 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("weasyprint") # GameEngine imports the gamemodes package
+
+from Game.GameEngine import GameEngine
+from Game.GameImage import BilliardBall
+from Game.gamemodes import common_utils as utils
+
+BALLS = ["white", "1", "2", "3", "4", "5", "6", "7", "eight", "9", "10", "11", "12", "13", "14", "15"]
+
+def coord(x, y):
+    return {"x": x, "y": y}
+
+def layout(seed, n=16, size=(2230, 1115), diam=57):
+    """ n balls at random positions on the table, not overlapping """
+    rng = np.random.default_rng(seed)
+    placed = []
+    while len(placed) < n:
+        p = np.round(rng.uniform([diam, diam], [size[0] - diam, size[1] - diam]), 1)
+        if all(np.linalg.norm(p - q) > diam for q in placed):
+            placed.append(p)
+    return {b: coord(float(p[0]), float(p[1])) for b, p in zip(BALLS, placed)}
+
+def reference_shots(engine, data, group):
+    """ GameEngine.getShots before it got vectorised: a loop over the balls, holes and obstacles """
+    white = data["white"]
+    wvec = np.array([white["x"], white["y"]])
+    shots = {}
+    for b, coords in data.items():
+        if b == "white":
+            continue
+        if group is not None and BilliardBall.getGroup(b) not in engine.group_map[group]:
+            continue
+        bvec = np.array([coords["x"], coords["y"]])
+        u = bvec - wvec
+
+        distances, lam = [], []
+        for h in engine.holes:
+            l = (np.dot((h - bvec), u)) / (np.linalg.norm(u, ord=2) ** 2)
+            lam.append(l)
+            distances.append(np.linalg.norm(h - bvec - l * u))
+        index = None
+        while min(distances) < 1e9:
+            i = distances.index(min(distances))
+            if lam[i] > 0:
+                index = i
+                break
+            distances[i] = 1e9
+        if index is None:
+            continue
+
+        hole = engine.holes[index]
+        uh = bvec - hole
+        len_uh = np.linalg.norm(uh)
+        endWhite = hole + uh * (len_uh + engine.diam) / len_uh
+
+        blocked = False
+        for start, end in [(wvec, endWhite), (hole, bvec)]:
+            for other, other_coords in data.items():
+                if other in [b, "white"]:
+                    continue
+                is_in_region, distance = utils.project_on_segment(utils.coord_to_vec(other_coords), start, end)
+                if is_in_region and distance <= engine.diam:
+                    blocked = True
+        if blocked:
+            continue
+
+        shots[b] = {"hole": coord(hole[0], hole[1]), "ball": coords, "end-white": coord(endWhite[0], endWhite[1]), "white": white}
+    return shots
+
+@pytest.mark.parametrize("seed", range(40))
+@pytest.mark.parametrize("n", [3, 8, 16])
+@pytest.mark.parametrize("group", ["open", "full", "half", "eight"])
+def test_getShots_matches_the_loop_implementation(seed, n, group):
+    engine = GameEngine()
+    data = layout(seed, n)
+    shots = engine.getShots(data, group)
+    expected = reference_shots(engine, data, None if group == "open" else group)
+
+    assert shots.keys() == expected.keys()
+    for b, shot in shots.items():
+        assert shot["hole"] == expected[b]["hole"]
+        assert shot["ball"] is data[b] and shot["white"] is data["white"]
+        assert np.allclose([shot["end-white"]["x"], shot["end-white"]["y"]], [expected[b]["end-white"]["x"], expected[b]["end-white"]["y"]])
+
+def test_getShots_needs_the_white_ball():
+    assert GameEngine().getShots({"1": coord(300, 300)}) == {}
+
+def test_searchShots_straight_shot():
+    engine = GameEngine(budget=1)
+    data = {"white": coord(628, 628), "1": coord(328, 328)} # in line with the corner hole at (28, 28)
+    shot = engine.searchShots(data, "full")["1"]
+
+    assert (shot["hole"]["x"], shot["hole"]["y"]) == (28, 28)
+    assert "type" not in shot
+    assert np.allclose([shot["end-white"]["x"], shot["end-white"]["y"]], 328 + engine.diam / np.sqrt(2))
+    assert np.isfinite(shot["difficulty"])
+
+def test_searchShots_combination_when_the_direct_shot_is_blocked():
+    engine = GameEngine(budget=1, cushions=0)
+    data = {"white": coord(928, 928), "2": coord(628, 628), "1": coord(328, 328)} # the white can only reach 1 over 2
+    shot = engine.searchShots(data, "full")["1"]
+
+    assert shot["type"] == "combination"
+    assert shot["ball"] is data["2"]
+    assert [(p["x"], p["y"]) for p in shot["path"]] == [(628, 628), (328, 328), (28, 28)]
+
+def test_searchShots_bank_shots_reflect_off_the_cushions():
+    engine = GameEngine(budget=1, cushions=2, combinations=False)
+    r = engine.diam / 2
+    banks = 0
+    for seed in range(20):
+        for shot in engine.searchShots(layout(seed, 8), "open").values():
+            path = np.array([[p["x"], p["y"]] for p in shot.get("path", [shot["ball"], shot["hole"]])])
+            assert tuple(path[0]) == (shot["ball"]["x"], shot["ball"]["y"])
+            assert tuple(path[-1]) == (shot["hole"]["x"], shot["hole"]["y"])
+            if shot.get("type") != "bank":
+                continue
+            banks += 1
+            for before, bounce, after in zip(path, path[1:], path[2:]):
+                # on a cushion line, and the mirrored next point is in line with the incoming path
+                on_x, on_y = np.isclose(bounce[0], [r, engine.w - r]).any(), np.isclose(bounce[1], [r, engine.h - r]).any()
+                assert on_x or on_y
+                axis = 0 if on_x else 1
+                mirrored = after.copy()
+                mirrored[axis] = 2 * bounce[axis] - after[axis]
+                u, v = bounce - before, mirrored - bounce
+                assert np.isclose(u[0] * v[1] - u[1] * v[0], 0, atol=1e-6 * np.linalg.norm(u) * np.linalg.norm(v))
+    assert banks != 0
+
+def test_searchShots_returns_the_k_easiest_shots_easiest_first():
+    engine = GameEngine(budget=1)
+    for seed in range(10):
+        data = layout(seed, 16)
+        shots = engine.searchShots(data, "open")
+        difficulties = [shot["difficulty"] for shot in shots.values()]
+        assert difficulties == sorted(difficulties)
+
+        top = engine.searchShots(data, "open", k=3)
+        assert list(top.keys()) == list(shots.keys())[:3]
+
+def test_estimateSuccess_is_repeatable_and_bounded():
+    engine = GameEngine(budget=1, samples=2000, max_samples=1000)
+    data = {"white": coord(628, 628), "1": coord(328, 328), "9": coord(1400, 300)}
+    shots = engine.searchShots(data, "open")
+    assert len(shots) == 2
+    a = engine.estimateSuccess({b: dict(shot) for b, shot in shots.items()}, seed=1)
+    b = engine.estimateSuccess({b: dict(shot) for b, shot in shots.items()}, seed=1)
+
+    assert [shot["success"] for shot in a.values()] == [shot["success"] for shot in b.values()]
+    for shot in a.values():
+        success = shot["success"]
+        assert success["samples"] == 500 # max_samples shared by both shots
+        assert 0 <= success["low"] <= success["rate"] <= success["high"] <= 1
+
+def test_estimateSuccess_prefers_short_straight_shots():
+    engine = GameEngine(budget=1)
+    easy = engine.searchShots({"white": coord(428, 428), "1": coord(228, 228)}, "full")
+    hard = engine.searchShots({"white": coord(2000, 900), "1": coord(600, 250)}, "full")
+    easy = engine.estimateSuccess(easy, seed=0)["1"]["success"]
+    hard = engine.estimateSuccess(hard, seed=0)["1"]["success"]
+
+    assert easy["rate"] > 0.9
+    assert easy["low"] > hard["high"]
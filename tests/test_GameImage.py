@@ -0,0 +1,48 @@
+import numpy as np
+from PIL import Image
+
+from Game.GameImage import GameImage, part_key
+
+def texts(image):
+    return [part["text"] for part in image.definition if part["type"] == "text"]
+
+def test_copy_keeps_what_it_was_taken_from():
+    image = GameImage(definition=[{"type": "text", "text": "shot 1"}])
+    snapshot = image.copy()
+    shown = snapshot.getImageCV2().copy()
+
+    image.update_text("shot 2")
+    image.getImageCV2()
+
+    assert texts(snapshot) == ["shot 1"]
+    assert np.array_equal(snapshot.getImageCV2(), shown)
+
+def test_copy_keeps_its_definition_when_the_shared_store_gets_assigned_again():
+    # like longest_break: the definition returned by draw_from_dict gets passed in again after the image got its own
+    image = GameImage(definition=[{"type": "text", "text": "shot 1"}])
+    definition = image.definition
+    snapshot = image.copy()
+    shown = snapshot.getImageCV2().copy()
+
+    image.update_definition({"type": "line", "c1": [0, 0], "c2": [100, 100]})
+    image.draw_from_dict(definition, draw=False)
+    image.update_text("shot 2")
+    image.rm_definition("text")
+
+    assert texts(snapshot) == ["shot 1"]
+    assert np.array_equal(snapshot.getImageCV2(), shown)
+
+def test_images_in_parts_are_keyed_by_content():
+    key = part_key({"type": "central_image", "img": Image.new("RGBA", (40, 40), "red")})
+
+    assert part_key({"type": "central_image", "img": Image.new("RGBA", (40, 40), "red")}) == key
+    assert part_key({"type": "central_image", "img": Image.new("RGBA", (40, 40), "blue")}) != key
+
+def test_assigned_definition_gets_drawn_on_export():
+    image = GameImage(definition=[{"type": "text", "text": "A"}])
+    shown = image.getImageCV2().copy()
+
+    image.definition = [{"type": "text", "text": "B"}]
+
+    assert not np.array_equal(image.copy().getImageCV2(), shown)
+    assert np.array_equal(image.getImageCV2(), GameImage(definition=[{"type": "text", "text": "B"}]).getImageCV2())
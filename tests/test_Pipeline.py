@@ -0,0 +1,41 @@
+import threading
+import time
+
+import pytest
+
+from Game.Pipeline import Pipeline
+
+def test_stage_starts_after_its_dependencies():
+    p = Pipeline()
+    p.run("first", time.sleep, 0.02)
+    p.run("second", time.sleep, 0.01)
+    p.run("last", lambda: "done", after=["first", "second"])
+    assert p.result("last", timeout=1) == "done"
+
+    timings = p.wait(timeout=1)
+    assert timings["last"]["start_ms"] >= timings["first"]["end_ms"]
+    assert timings["last"]["start_ms"] >= timings["second"]["end_ms"]
+    assert timings["total_ms"] >= timings["last"]["end_ms"]
+
+def test_independent_stages_run_in_parallel():
+    barrier = threading.Barrier(2, timeout=1) # breaks if the stages run one after the other
+    p = Pipeline()
+    p.run("sound", barrier.wait)
+    p.run("capture", barrier.wait)
+    p.result("sound", timeout=1)
+    p.result("capture", timeout=1)
+
+def test_failed_stage_skips_the_stages_after_it():
+    calls = []
+    p = Pipeline()
+    p.run("capture", lambda: 1 / 0)
+    p.run("finished", calls.append, "finished", after=["capture"])
+    p.run("other", calls.append, "other")
+
+    with pytest.raises(ZeroDivisionError):
+        p.result("capture", timeout=1)
+    with pytest.raises(RuntimeError):
+        p.result("finished", timeout=1)
+    timings = p.wait(timeout=1) # prints the failures, does not raise
+    assert calls == ["other"]
+    assert "finished" not in timings